@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from constants import ARTIFACT_CACHE_FOLDER
+
+
+def artifact_key(stage, content_hash, **params):
+    """
+    Cache key for a pipeline stage's output
+
+    Args:
+        stage (str): Stage name, e.g. 'transcript', 'frames' or 'notes'
+        content_hash (str): Hash of the stage's input (video or transcript contents)
+        **params: Every parameter that changes the stage's output
+
+    Returns:
+        str: Hex digest identifying the output
+    """
+    identity = json.dumps({"stage": stage, "input": content_hash, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of stage outputs shared by every output folder
+
+    Each entry is a folder <root>/<stage>/<key>/ holding copies of the output
+    files (paths relative to the output folder) and a manifest.json listing them.
+    Entries are written to a temporary folder and renamed into place, so a
+    reader never sees a partly written entry.
+    """
+    def __init__(self, root=ARTIFACT_CACHE_FOLDER):
+        self.root = root
+
+    def _entry(self, stage, key):
+        return os.path.join(self.root, stage, key)
+
+    def contains(self, stage, key):
+        return os.path.exists(os.path.join(self._entry(stage, key), "manifest.json"))
+
+    def fetch(self, stage, key, output_folder):
+        """
+        Copies a cached entry's files into output_folder
+
+        Returns:
+            list: Relative paths of the restored files, or None on a cache miss
+        """
+        if not self.contains(stage, key):
+            return None
+        entry = self._entry(stage, key)
+        with open(os.path.join(entry, "manifest.json"), "r") as f:
+            files = json.load(f)["files"]
+
+        for relative_path in files:
+            destination = os.path.join(output_folder, relative_path)
+            os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+            shutil.copyfile(os.path.join(entry, relative_path), destination)
+        print(f"Restored {len(files)} cached {stage} files into {output_folder}")
+        return files
+
+    def store(self, stage, key, output_folder, files, **info):
+        """
+        Copies files from output_folder into the cache under key
+
+        Args:
+            stage (str): Stage name
+            key (str): Key from artifact_key
+            output_folder (str): Folder the files are relative to
+            files (list): Relative paths of the stage's output files
+            **info: Extra details recorded in the manifest
+        """
+        entry = self._entry(stage, key)
+        if os.path.exists(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f".{key[:16]}_", dir=os.path.dirname(entry))
+        try:
+            for relative_path in files:
+                destination = os.path.join(staging, relative_path)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copyfile(os.path.join(output_folder, relative_path), destination)
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump({
+                    "stage": stage,
+                    "files": list(files),
+                    "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    **info
+                }, f, indent=2)
+            os.rename(staging, entry)
+        except OSError:
+            # Another writer stored the same entry first
+            if not os.path.exists(entry):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from openai import AsyncOpenAI, NotFoundError
+from constants import ASSISTANT_REGISTRY_FILE, THREAD_POLICY, THREAD_POLICIES, ASSISTANT_MAX_AGE_DAYS
+
+
+def assistant_key(instructions, model):
+    """Registry key of an assistant: hash of its instructions and model"""
+    return hashlib.sha256(f"{model}\n{instructions}".encode("utf-8")).hexdigest()
+
+
+# Guards read-modify-write of registry files by every registry in the process
+_file_lock = threading.Lock()
+
+
+class AssistantRegistry:
+    """
+    JSON file of the assistants and threads created by earlier runs
+
+    Assistants are reused across runs as long as their instructions and model
+    are unchanged. Threads follow thread_policy:
+        'reuse'   - keep the thread, so the conversation carries on across runs
+        'recycle' - start a fresh thread each run and delete it when the run releases it
+
+    Each entry holds the assistant id, the shared thread id (under 'reuse') and
+    when the assistant was created and last used. API calls are made outside
+    the file lock, so runs in other event loops or threads never wait on them.
+    """
+    def __init__(self, client: AsyncOpenAI, path=ASSISTANT_REGISTRY_FILE, thread_policy=THREAD_POLICY):
+        if thread_policy not in THREAD_POLICIES:
+            raise ValueError(f"Unknown thread policy: {thread_policy}. Expected one of {THREAD_POLICIES}")
+        self.client = client
+        self.path = path
+        self.thread_policy = thread_policy
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _save(self, entries):
+        partial_path = f"{self.path}.partial"
+        with open(partial_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(partial_path, self.path)
+
+    def _update(self, update):
+        """Applies update(entries) to the registry file and returns its result"""
+        with _file_lock:
+            entries = self._load()
+            result = update(entries)
+            self._save(entries)
+            return result
+
+    async def acquire_assistant(self, role, instructions, model):
+        """
+        Returns the id of the registered assistant for the role, creating it if missing
+
+        Returns:
+            str: Id of the assistant to use for this run
+        """
+        key = assistant_key(instructions, model)
+        with _file_lock:
+            entry = self._load().get(key)
+
+        if entry is None:
+            assistant = await self.client.beta.assistants.create(
+                name=f"Lecture {role}",
+                instructions=instructions,
+                model=model
+            )
+
+            def register(entries):
+                if key in entries:
+                    return entries[key], assistant.id
+                entries[key] = {"role": role, "model": model, "assistant_id": assistant.id, "thread_id": None,
+                                "created_at": time.time()}
+                return entries[key], None
+
+            entry, duplicate = self._update(register)
+            if duplicate is not None:
+                # Another run registered the same assistant meanwhile
+                await self._delete(self.client.beta.assistants.delete, duplicate)
+
+        def touch(entries):
+            current = entries.setdefault(key, entry)
+            current["last_used"] = time.time()
+            return current["assistant_id"]
+
+        return self._update(touch)
+
+    async def acquire_thread(self, instructions, model):
+        """
+        Returns the thread for this run of the assistant: the shared one under 'reuse', else a new one
+
+        Returns:
+            str: Id of the thread
+        """
+        key = assistant_key(instructions, model)
+        if self.thread_policy == "recycle":
+            return (await self.client.beta.threads.create()).id
+
+        with _file_lock:
+            entry = self._load().get(key) or {}
+        if entry.get("thread_id"):
+            return entry["thread_id"]
+        created_thread = (await self.client.beta.threads.create()).id
+
+        def register(entries):
+            current = entries.get(key)
+            if current is None:
+                return created_thread  # The entry was forgotten meanwhile; the thread stays unregistered
+            if current["thread_id"] is None:
+                current["thread_id"] = created_thread
+            return current["thread_id"]
+
+        thread_id = self._update(register)
+        if thread_id != created_thread:
+            # Another run registered a shared thread meanwhile
+            await self._delete(self.client.beta.threads.delete, created_thread)
+        return thread_id
+
+    async def acquire(self, role, instructions, model):
+        """
+        Returns (assistant_id, thread_id) for the role, creating only what is missing
+
+        Returns:
+            tuple: Ids of the assistant and of the thread to use for this run
+        """
+        assistant_id = await self.acquire_assistant(role, instructions, model)
+        return assistant_id, await self.acquire_thread(instructions, model)
+
+    async def release(self, thread_id):
+        """Ends a run's use of its thread; under 'recycle' the thread is deleted"""
+        if self.thread_policy == "recycle" and thread_id is not None:
+            await self._delete(self.client.beta.threads.delete, thread_id)
+
+    async def forget(self, instructions, model):
+        """Drops an entry whose assistant or thread no longer exists"""
+        self._update(lambda entries: entries.pop(assistant_key(instructions, model), None))
+
+    @staticmethod
+    async def _delete(delete, object_id):
+        try:
+            await delete(object_id)
+        except NotFoundError:
+            pass
+
+    async def cleanup(self, max_age_days=ASSISTANT_MAX_AGE_DAYS, include_orphans=False):
+        """
+        Deletes the assistants and threads of entries unused for max_age_days
+
+        All deletions are sent concurrently. With include_orphans, assistants
+        named 'Lecture ...' that the registry doesn't know about (left behind
+        by runs before the registry existed) are deleted as well; that includes
+        assistants registered by other installs sharing the API key.
+
+        Returns:
+            int: Number of assistants deleted
+        """
+        cutoff = time.time() - max_age_days * 24 * 3600
+
+        def remove_stale(entries):
+            stale = {key: entry for key, entry in entries.items() if entry.get("last_used", 0) < cutoff}
+            for key in stale:
+                del entries[key]
+            return stale, dict(entries)
+
+        stale, entries = self._update(remove_stale)
+
+        assistant_ids = [entry["assistant_id"] for entry in stale.values()]
+        thread_ids = [entry["thread_id"] for entry in stale.values() if entry["thread_id"]]
+        if include_orphans:
+            known = {entry["assistant_id"] for entry in entries.values()}
+            async for assistant in self.client.beta.assistants.list(limit=100):
+                if (assistant.name or "").startswith("Lecture ") and assistant.id not in known \
+                        and assistant.id not in assistant_ids:
+                    assistant_ids.append(assistant.id)
+
+        await asyncio.gather(
+            *[self._delete(self.client.beta.assistants.delete, assistant_id) for assistant_id in assistant_ids],
+            *[self._delete(self.client.beta.threads.delete, thread_id) for thread_id in thread_ids]
+        )
+        print(f"Deleted {len(assistant_ids)} assistants and {len(thread_ids)} threads")
+        return len(assistant_ids)
@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import subprocess
+import numpy as np
+from Utils import video_content_hash
+from constants import AUDIO_FOLDER, AUDIO_SAMPLE_RATE, FFMPEG_BINARY
+
+
+def _decode_audio(video_path, destination, sample_rate, ffmpeg_binary):
+    """Decodes the audio track with ffmpeg straight into a raw float32 file"""
+    ffmpeg = shutil.which(ffmpeg_binary)
+    if ffmpeg is None:
+        raise FileNotFoundError(f"ffmpeg executable not found: {ffmpeg_binary}")
+    subprocess.run(
+        [ffmpeg, "-nostdin", "-v", "error", "-threads", "0", "-y", "-i", video_path,
+         "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-acodec", "pcm_f32le", destination],
+        check=True, capture_output=True
+    )
+
+
+def load_audio(video_path, output_folder, sample_rate=AUDIO_SAMPLE_RATE, ffmpeg_binary=FFMPEG_BINARY):
+    """
+    Returns the video's audio as 16 kHz mono float32 samples, decoding it only once
+
+    The decoded samples are stored under <output_folder>/audio/ as a raw float32
+    file named after the video's content hash and opened as a copy-on-write
+    memory map, so callers share the cached decode without reading it into memory.
+
+    Args:
+        video_path (str): Path to the video file
+        output_folder (str): Folder holding the audio cache
+        sample_rate (int): Sample rate to decode to
+        ffmpeg_binary (str): ffmpeg executable
+
+    Returns:
+        np.memmap: float32 samples
+    """
+    audio_folder = os.path.join(output_folder, AUDIO_FOLDER)
+    os.makedirs(audio_folder, exist_ok=True)
+    key = f"{video_content_hash(video_path)[:32]}_{sample_rate}"
+    samples_path = os.path.join(audio_folder, f"{key}.f32")
+    meta_path = os.path.join(audio_folder, f"{key}.json")
+
+    if not os.path.exists(meta_path):
+        partial_path = f"{samples_path}.partial"
+        _decode_audio(video_path, partial_path, sample_rate, ffmpeg_binary)
+        os.replace(partial_path, samples_path)
+        with open(meta_path, "w") as f:
+            json.dump({
+                "video": os.path.basename(video_path),
+                "sample_rate": sample_rate,
+                "samples": os.path.getsize(samples_path) // 4
+            }, f, indent=2)
+
+    with open(meta_path, "r") as f:
+        samples = json.load(f)["samples"]
+    if samples == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(samples_path, dtype=np.float32, mode="c", shape=(samples,))
@@ -0,0 +1,114 @@
+import os
+import time
+import cv2
+import numpy as np
+from Utils import extract_scene_number
+from constants import (
+    BLANK_CLASSIFIER_WIDTH,
+    BLANK_MAX_STD,
+    BLANK_MIN_EDGE_DENSITY,
+    BLANK_MIN_TEXT_ROWS,
+    BLANK_EDGE_THRESHOLD
+)
+
+
+def to_classifier_input(frame, width=BLANK_CLASSIFIER_WIDTH):
+    """Grayscale thumbnail of a frame at the classifier's working resolution"""
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    height = max(2, round(gray_frame.shape[0] * width / gray_frame.shape[1]))
+    return cv2.resize(gray_frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def frame_features(gray_batch):
+    """
+    Content features for a batch of equally sized grayscale thumbnails
+
+    Args:
+        gray_batch (np.ndarray): uint8 array of shape (N, H, W)
+
+    Returns:
+        dict: Arrays of shape (N,) for 'std' (intensity spread), 'edge_density'
+            (fraction of strong gradient pixels) and 'text_rows' (fraction of rows
+            dense enough in edges to hold text)
+    """
+    batch = gray_batch.astype(np.float32)
+    count = len(batch)
+
+    std = batch.reshape(count, -1).std(axis=1)
+
+    horizontal = np.abs(np.diff(batch, axis=2))[:, :-1, :]
+    vertical = np.abs(np.diff(batch, axis=1))[:, :, :-1]
+    edges = np.maximum(horizontal, vertical) > BLANK_EDGE_THRESHOLD
+    edge_density = edges.mean(axis=(1, 2))
+    text_rows = (edges.mean(axis=2) > 0.02).mean(axis=1)
+
+    return {"std": std, "edge_density": edge_density, "text_rows": text_rows}
+
+
+def classify_blank_frames(gray_batch):
+    """
+    Flags blank, black and faded transition frames in a batch
+
+    A frame is blank only when its intensities barely vary and it has neither
+    edges nor text-like rows. Sparse slides such as a title on a plain
+    background vary little overall, but their text still has edges.
+
+    Args:
+        gray_batch (np.ndarray): uint8 array of shape (N, H, W)
+
+    Returns:
+        np.ndarray: Boolean array of shape (N,), True for frames without content
+    """
+    features = frame_features(gray_batch)
+    return (
+        (features["std"] < BLANK_MAX_STD)
+        & (features["edge_density"] < BLANK_MIN_EDGE_DENSITY)
+        & (features["text_rows"] < BLANK_MIN_TEXT_ROWS)
+    )
+
+
+def classifier_settings():
+    """The thresholds that decide which frames are blank, for keying cached results"""
+    return {"width": BLANK_CLASSIFIER_WIDTH, "edge_threshold": BLANK_EDGE_THRESHOLD, "max_std": BLANK_MAX_STD,
+            "min_edge_density": BLANK_MIN_EDGE_DENSITY, "min_text_rows": BLANK_MIN_TEXT_ROWS}
+
+
+def is_blank_frame(frame):
+    """Classifies a single BGR or grayscale frame"""
+    return bool(classify_blank_frames(to_classifier_input(frame)[None])[0])
+
+
+def remove_blank_frames(folder_path):
+    """
+    Deletes blank and transition scene images in one batch, without any network calls
+
+    Args:
+        folder_path (str): Folder containing scene_N.png files
+
+    Returns:
+        list: Remaining image files in scene order
+    """
+    image_files = sorted((f for f in os.listdir(folder_path) if f.endswith('.png')), key=extract_scene_number)
+    if not image_files:
+        print(f"No png files found in {folder_path}")
+        return []
+
+    thumbnails = [to_classifier_input(cv2.imread(os.path.join(folder_path, f))) for f in image_files]
+    # Group by thumbnail size so each group is classified as one array
+    sizes = {}
+    for position, thumbnail in enumerate(thumbnails):
+        sizes.setdefault(thumbnail.shape, []).append(position)
+
+    start_time = time.perf_counter()
+    blank = np.zeros(len(image_files), dtype=bool)
+    for positions in sizes.values():
+        blank[positions] = classify_blank_frames(np.stack([thumbnails[p] for p in positions]))
+    elapsed = time.perf_counter() - start_time
+    print(f"Classified {len(image_files)} frames in {elapsed * 1000:.1f}ms "
+          f"({elapsed * 1000 / len(image_files):.3f}ms per frame)")
+
+    for image_file, is_blank in zip(image_files, blank):
+        if is_blank:
+            os.remove(os.path.join(folder_path, image_file))
+            print(f"Removed {image_file} as it doesn't have meaningful content")
+    return [f for f, is_blank in zip(image_files, blank) if not is_blank]
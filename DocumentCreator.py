@@ -5,6 +5,8 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import subprocess
+from SlideAlignment import load_slide_index
+from Utils import extract_scene_number
 
 class DocumentCreator:
     def __init__(self):
@@ -15,6 +17,9 @@ class DocumentCreator:
     def create_document(self, output_folder):
         """
         Converts lecture_notes.md to Word format and appends lecture slides
+
+        When the scene manifest and timestamped transcript are available, each
+        slide is followed by what was said while it was shown.
         
         Args:
             output_folder (str): Path to the folder containing lecture_notes.md
@@ -43,6 +48,7 @@ class DocumentCreator:
             doc.add_heading('Lecture Slides', 1)
             
             # Add slides (existing code)
+            slides = load_slide_index(output_folder)
             image_files = sorted([f for f in os.listdir(output_folder) if f.endswith('.png')])
             if image_files:
                 for img_file in image_files:
@@ -50,6 +56,11 @@ class DocumentCreator:
                     doc.add_picture(img_path, width=Inches(6.0))
                     caption = doc.add_paragraph(f"Slide: {img_file}")
                     caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    scene_number = extract_scene_number(img_file)
+                    if slides is not None and scene_number in slides and slides.text_for(scene_number):
+                        excerpt = doc.add_paragraph().add_run(slides.text_for(scene_number))
+                        excerpt.italic = True
+                        excerpt.font.size = Pt(9)
                     doc.add_paragraph()
 
             doc.save(docx_file_path)
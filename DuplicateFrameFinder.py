@@ -0,0 +1,153 @@
+import os
+import cv2
+import numpy as np
+from FrameSignatureIndex import downscale_gray
+from Utils import extract_scene_number
+from constants import (
+    COMPARE_WIDTH,
+    DUPLICATE_HASH_SIZE,
+    DUPLICATE_HASH_DISTANCE,
+    DUPLICATE_HASH_MARGIN,
+    DUPLICATE_GRID_CELLS,
+    DUPLICATE_MAX_CELL_DIFF
+)
+
+
+def dhash(gray_image, hash_size=DUPLICATE_HASH_SIZE, margin=DUPLICATE_HASH_MARGIN):
+    """
+    Difference hash of a grayscale image as an integer of hash_size**2 bits
+
+    Each bit records whether a pixel is brighter than its left neighbour by
+    more than margin gray levels in a (hash_size + 1) x hash_size thumbnail, so
+    small re-encoding differences and resolution changes leave the hash (nearly)
+    unchanged. The margin keeps flat backgrounds from hashing to noise.
+    """
+    thumbnail = cv2.resize(gray_image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1] + margin).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def cell_difference(gray_image, other_gray_image, cells=DUPLICATE_GRID_CELLS):
+    """
+    Largest mean absolute difference of any cell in a grid cells wide laid over two images
+
+    A change confined to one area, such as a new bullet line, stands out in its
+    cells, while noise and re-encoding differences average out everywhere.
+    """
+    if other_gray_image.shape != gray_image.shape:
+        other_gray_image = cv2.resize(other_gray_image, gray_image.shape[::-1], interpolation=cv2.INTER_AREA)
+    difference = cv2.absdiff(gray_image, other_gray_image).astype(np.float32)
+    rows = max(1, round(cells * gray_image.shape[0] / gray_image.shape[1]))
+    return float(cv2.resize(difference, (cells, rows), interpolation=cv2.INTER_AREA).max())
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over integer hashes with Hamming distance
+
+    Lookups within a small radius only visit children whose edge distance is
+    within radius of the query distance, which keeps them close to O(log n).
+    """
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, hash_value, item):
+        self.size += 1
+        node = [hash_value, item, {}]
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming_distance(hash_value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, hash_value, radius):
+        """Returns (distance, item) for every stored hash within radius"""
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node_hash, item, children = stack.pop()
+            distance = hamming_distance(hash_value, node_hash)
+            if distance <= radius:
+                matches.append((distance, item))
+            for edge, child in children.items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return matches
+
+
+def find_duplicate_frames(folder_path, max_distance=DUPLICATE_HASH_DISTANCE, hash_size=DUPLICATE_HASH_SIZE,
+                          max_cell_difference=DUPLICATE_MAX_CELL_DIFF):
+    """
+    Finds scene images that repeat an earlier scene anywhere in the video
+
+    Scenes are visited in order; each is looked up in a BK-tree of the earlier
+    unique scenes. Hashes within max_distance are only candidates: the closest
+    one whose image also passes cell_difference is reported as the original,
+    and a scene with no such match is added to the tree.
+
+    Args:
+        folder_path (str): Folder containing scene_N.png files
+        max_distance (int): Largest Hamming distance between hashes of candidate matches
+        hash_size (int): Hash grid size; hashes have hash_size**2 bits
+        max_cell_difference (float): Largest cell difference, in gray levels, between images of the same slide
+
+    Returns:
+        list: (duplicate_file, original_file, distance) tuples
+    """
+    image_files = [f for f in os.listdir(folder_path) if f.endswith('.png')]
+    image_files.sort(key=extract_scene_number)
+
+    tree = BKTree()
+    thumbnails = {}
+    duplicates = []
+    for image_file in image_files:
+        gray_image = cv2.imread(os.path.join(folder_path, image_file), cv2.IMREAD_GRAYSCALE)
+        if gray_image is None:
+            print(f"Could not read {image_file}, skipping")
+            continue
+        hash_value = dhash(gray_image, hash_size)
+        thumbnail = downscale_gray(gray_image, COMPARE_WIDTH)
+        matches = sorted(tree.search(hash_value, max_distance),
+                         key=lambda match: (match[0], extract_scene_number(match[1])))
+        original = next(((distance, original_file) for distance, original_file in matches
+                         if cell_difference(thumbnails[original_file], thumbnail) <= max_cell_difference), None)
+        if original is not None:
+            duplicates.append((image_file, original[1], original[0]))
+        else:
+            tree.add(hash_value, image_file)
+            thumbnails[image_file] = thumbnail
+    return duplicates
+
+
+def remove_duplicate_frames(folder_path, max_distance=DUPLICATE_HASH_DISTANCE):
+    """
+    Deletes scene images that revisit an earlier slide, keeping the first occurrence
+
+    Works offline as a replacement for the pairwise GPT comparison.
+
+    Args:
+        folder_path (str): Folder containing scene_N.png files
+        max_distance (int): Largest Hamming distance between hashes of the same slide
+
+    Returns:
+        list: Remaining image files in scene order
+    """
+    print("Starting remove_duplicate_frames function")
+    for image_file, original_file, distance in find_duplicate_frames(folder_path, max_distance):
+        os.remove(os.path.join(folder_path, image_file))
+        print(f"Removed duplicate scene: {image_file} (matches {original_file}, distance {distance})")
+
+    unique_images = sorted((f for f in os.listdir(folder_path) if f.endswith('.png')), key=extract_scene_number)
+    print(f"Finished remove_duplicate_frames function, {len(unique_images)} unique images remain")
+    return unique_images
@@ -0,0 +1,84 @@
+import re
+import shutil
+import subprocess
+import numpy as np
+from constants import FFMPEG_BINARY
+
+
+class FFmpegFrameSource:
+    """
+    Streams downscaled grayscale frames from an ffmpeg subprocess
+
+    Frame selection, scaling and the conversion to gray all happen inside ffmpeg,
+    which writes raw 8-bit frames to a pipe. Each frame is exposed as a
+    zero-copy np.frombuffer view over the bytes read from the pipe.
+
+    With keyframes_only the decoder skips every non-key frame, and the frame
+    indices come from a keyframe-only pre-pass that reads their timestamps.
+    """
+    def __init__(self, video_path, width, height, fps, skip_frames=1, keyframes_only=False,
+                 ffmpeg_binary=FFMPEG_BINARY):
+        self.ffmpeg = shutil.which(ffmpeg_binary)
+        if self.ffmpeg is None:
+            raise FileNotFoundError(f"ffmpeg executable not found: {ffmpeg_binary}")
+        self.video_path = video_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.skip_frames = skip_frames
+        self.keyframes_only = keyframes_only
+
+    def _command(self):
+        filters = []
+        if not self.keyframes_only and self.skip_frames > 1:
+            # Same frames as the OpenCV loop: every skip_frames-th frame, 1-based
+            filters.append(f"select='not(mod(n+1\\,{self.skip_frames}))'")
+        filters.append(f"scale={self.width}:{self.height}:flags=area")
+        filters.append("format=gray")
+
+        command = [self.ffmpeg, "-v", "error", "-nostdin"]
+        if self.keyframes_only:
+            command += ["-skip_frame", "nokey"]
+        command += [
+            "-i", self.video_path,
+            "-an", "-sn",
+            "-vf", ",".join(filters),
+            "-fps_mode", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", "gray", "-"
+        ]
+        return command
+
+    def keyframe_indices(self):
+        """Frame indices of the keyframes, read by decoding only keyframes"""
+        result = subprocess.run(
+            [self.ffmpeg, "-nostdin", "-skip_frame", "nokey", "-i", self.video_path,
+             "-an", "-sn", "-vf", "showinfo", "-fps_mode", "passthrough", "-f", "null", "-"],
+            capture_output=True, text=True, check=True
+        )
+        times = [float(t) for t in re.findall(r"pts_time:\s*([-\d.]+)", result.stderr)]
+        return [round(t * self.fps) for t in times]
+
+    def __iter__(self):
+        """Yields (frame_index, gray_frame) for every selected frame"""
+        frame_bytes = self.width * self.height
+        if self.keyframes_only:
+            indices = iter(self.keyframe_indices())
+        else:
+            indices = iter(range(self.skip_frames - 1, 1 << 62, self.skip_frames))
+
+        process = subprocess.Popen(self._command(), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   bufsize=frame_bytes * 4)
+        try:
+            for frame_index in indices:
+                buffer = process.stdout.read(frame_bytes)
+                if len(buffer) < frame_bytes:
+                    break
+                yield frame_index, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width)
+        finally:
+            process.stdout.close()
+            process.kill()
+            process.wait()
+            errors = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            if process.returncode not in (0, -9) and errors:
+                print(f"ffmpeg reported: {errors}")
@@ -0,0 +1,179 @@
+import cv2
+import hashlib
+import json
+import os
+import numpy as np
+from constants import SIGNATURE_FOLDER, COMPARE_WIDTH
+
+
+def video_fingerprint(video_path, sample_bytes=1024 * 1024):
+    """
+    Cheap identity for a video file: its size plus a hash of the first and last MB
+
+    Used to detect that a stored index belongs to the same video even after the
+    file has been rewritten (which changes its modification time).
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, "rb") as f:
+        digest.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(sample_bytes, size - sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+
+def thumbnail_shape(frame_shape, width):
+    """(height, width) of a frame downscaled to width; frames no wider keep their size"""
+    height, frame_width = frame_shape[:2]
+    if frame_width <= width:
+        return height, frame_width
+    return max(7, round(height * width / frame_width)), width
+
+
+def downscale_gray(gray_frame, width):
+    """Grayscale frame downscaled to width, the representation scene decisions are made on"""
+    height, thumbnail_width = thumbnail_shape(gray_frame.shape, width)
+    if thumbnail_width == gray_frame.shape[1]:
+        return gray_frame
+    return cv2.resize(gray_frame, (thumbnail_width, height), interpolation=cv2.INTER_AREA)
+
+
+def scale_region(region, frame_shape, scaled_shape):
+    """Maps an (x, y, w, h) region in frame_shape pixels onto a copy of the frame resized to scaled_shape"""
+    if region is None:
+        return None
+    scale_x = scaled_shape[1] / frame_shape[1]
+    scale_y = scaled_shape[0] / frame_shape[0]
+    x, y, w, h = region
+    return (round(x * scale_x), round(y * scale_y), max(7, round(w * scale_x)), max(7, round(h * scale_y)))
+
+
+class FrameSignatureIndex:
+    """
+    Per-video store of downscaled grayscale thumbnails for every sampled frame
+
+    Thumbnails live in a memory-mapped .npy file next to the frame indices and
+    timestamps, so scene boundaries can be recomputed for a new threshold (or any
+    frame skip that is a multiple of the stored one) without decoding the video.
+    They are the same COMPARE_WIDTH frames ChangeDetector compares, so the same
+    settings give the same scenes as the pass that wrote the index.
+    """
+    THUMBNAILS_FILE = "thumbnails.npy"
+    FRAMES_FILE = "frames.npy"
+    TIMESTAMPS_FILE = "timestamps.npy"
+    META_FILE = "meta.json"
+
+    def __init__(self, output_folder):
+        self.folder = os.path.join(output_folder, SIGNATURE_FOLDER)
+        self.meta = None
+        self.thumbnails = None
+        self.frames = None
+        self.timestamps = None
+
+    # Writing
+    def create(self, video_path, skip_frames, frame_count, fps, frame_shape, width=COMPARE_WIDTH,
+               detected_slide_region=None, slide_region_detection=None, settings=None):
+        """
+        Starts a new index sized for frame_count frames sampled every skip_frames
+
+        When the slide region was detected automatically for this run,
+        slide_region_detection holds the detection settings and the result is
+        stored with them, so later runs with the same settings can skip the
+        detection. settings records the scene settings of the pass writing the index.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        # An index is only valid once close() writes its metadata
+        meta_path = os.path.join(self.folder, self.META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        height, width = thumbnail_shape(frame_shape, width)
+        capacity = max(1, frame_count // skip_frames + 1)
+        self.thumbnails = np.lib.format.open_memmap(
+            os.path.join(self.folder, self.THUMBNAILS_FILE), mode="w+", dtype=np.uint8,
+            shape=(capacity, height, width)
+        )
+        self.frames = []
+        self.timestamps = []
+        self.meta = {
+            "video": video_fingerprint(video_path),
+            "skip_frames": skip_frames,
+            "fps": fps,
+            "frame_count": frame_count,
+            "frame_width": frame_shape[1],
+            "frame_height": frame_shape[0],
+            "width": width,
+            "height": height,
+            "count": 0,
+            "complete": False,
+            "settings": settings
+        }
+        if slide_region_detection is not None:
+            self.meta["detected_slide_region"] = list(detected_slide_region) if detected_slide_region else None
+            self.meta["slide_region_detection"] = slide_region_detection
+
+    def add(self, frame_index, gray_frame):
+        """Records the thumbnail of one sampled grayscale frame"""
+        count = self.meta["count"]
+        if count >= len(self.thumbnails):
+            # Container reported fewer frames than it holds; stop recording
+            return
+        self.thumbnails[count] = self.thumbnail(gray_frame)
+        self.frames.append(frame_index)
+        self.timestamps.append(frame_index / self.meta["fps"] if self.meta["fps"] else 0.0)
+        self.meta["count"] = count + 1
+
+    def thumbnail(self, gray_frame):
+        return downscale_gray(gray_frame, self.meta["width"])
+
+    def close(self):
+        """Flushes the thumbnails and marks the index usable"""
+        self.thumbnails.flush()
+        np.save(os.path.join(self.folder, self.FRAMES_FILE), np.asarray(self.frames, dtype=np.int64))
+        np.save(os.path.join(self.folder, self.TIMESTAMPS_FILE), np.asarray(self.timestamps, dtype=np.float64))
+        self.meta["complete"] = True
+        with open(os.path.join(self.folder, self.META_FILE), "w") as f:
+            json.dump(self.meta, f, indent=2)
+        self.thumbnails = None
+
+    # Reading
+    def load(self, video_path, skip_frames):
+        """
+        Opens a stored index if it covers video_path at skip_frames
+
+        Returns:
+            bool: True if the index was loaded and can serve this skip rate
+        """
+        meta_path = os.path.join(self.folder, self.META_FILE)
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if not meta.get("complete") or skip_frames % meta["skip_frames"] != 0:
+            return False
+        if meta["video"] != video_fingerprint(video_path):
+            return False
+
+        self.meta = meta
+        count = meta["count"]
+        self.thumbnails = np.load(os.path.join(self.folder, self.THUMBNAILS_FILE), mmap_mode="r")[:count]
+        self.frames = np.load(os.path.join(self.folder, self.FRAMES_FILE))
+        self.timestamps = np.load(os.path.join(self.folder, self.TIMESTAMPS_FILE))
+        return True
+
+    def detected_slide_region(self, detection):
+        """
+        The slide region stored with the index, if it was detected with the given detection settings
+
+        Returns:
+            tuple: (found, region), where region is (x, y, w, h) in video pixels or None
+        """
+        if "detected_slide_region" not in self.meta or self.meta.get("slide_region_detection") != detection:
+            return False, None
+        region = self.meta["detected_slide_region"]
+        return True, tuple(region) if region is not None else None
+
+    def samples(self, skip_frames):
+        """Yields (frame_index, thumbnail) for the frames a run at skip_frames would compare"""
+        for position in np.flatnonzero((self.frames + 1) % skip_frames == 0):
+            yield int(self.frames[position]), np.asarray(self.thumbnails[position])
@@ -1,8 +1,11 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, NotFoundError
+import copy
+import hashlib
 import json
 import time
 import os
-from typing import Dict, Optional
+import re
+from typing import Callable, Dict, Optional
 import asyncio
 from constants import (
     TEACHER_INSTRUCTIONS,
@@ -16,73 +19,311 @@ from constants import (
     MISSING_CONTENT_FILE,
     COMBINED_NOTES_FILE,
     STUDENT_QUESTIONS_FILE,
+    QA_ANSWERS_FILE,
     DEBUG_FOLDER,
     DEFAULT_MODEL,
-    MAX_RETRIES,
     INITIAL_RETRY_DELAY,
-    BACKOFF_FACTOR
+    BACKOFF_FACTOR,
+    USE_ARTIFACT_CACHE,
+    ASSISTANT_MODEL,
+    OPENAI_BASE_URL,
+    OPENAI_TIMEOUT,
+    STREAM_RUNS,
+    RUN_TIMEOUT_SECONDS,
+    RUN_POLL_MAX_SECONDS,
+    RUN_FAILED_STATUSES,
+    USE_ASSISTANT_REGISTRY,
+    CHUNK_NOTES_PROMPT,
+    REDUCE_NOTES_PROMPT,
+    MAP_REDUCE_MIN_TOKENS,
+    NOTES_CHUNK_TOKENS,
+    NOTES_MAX_CONCURRENCY,
+    USE_RESPONSE_CACHE,
+    PARALLEL_NOTE_STEPS,
+    LOCAL_NOTES_MERGE,
+    SECTION_MATCH_THRESHOLD,
+    PLACE_SECTIONS_PROMPT
 )
+from ArtifactCache import ArtifactCache, artifact_key
+from AssistantRegistry import AssistantRegistry
+from NotesMerger import merge_sections, outline, end_section
+from ResponseCache import ResponseCache, context_after
+from SlideAlignment import load_slide_index
+from StepGraph import Step, run_steps, report_timings
+from TranscriptChunker import chunk_transcript, estimate_tokens
 
 class Assistant:
-    """Base class for OpenAI Assistants"""
-    def __init__(self, client: OpenAI, role: str, instructions: str):
-        self.assistant = client.beta.assistants.create(
-            name=f"Lecture {role}",
-            instructions=instructions,
-            model="gpt-4o-mini"
-        )
-        self.thread = client.beta.threads.create()
+    """
+    Base class for OpenAI Assistants
+
+    All calls go through an AsyncOpenAI client, so waiting on the API never
+    blocks the event loop. The assistant and its thread are set up on first
+    use, since that needs the event loop as well. With a registry they are
+    taken from earlier runs where possible instead of being created each time.
+
+    Runs are streamed by default: the reply is returned as soon as the run
+    completes, and each piece of text is passed to on_token(role, text) as it
+    arrives. Either way a run fails once RUN_TIMEOUT_SECONDS have passed.
+
+    With a response cache, a request identical to an earlier one (same model,
+    instructions, prompt and everything said before on the thread) returns the
+    earlier reply without calling the API. The cached exchange is added to the
+    thread with the next request that does reach the API, so that request sees
+    the same conversation it would have without the cache.
+    """
+    def __init__(self, client: AsyncOpenAI, role: str, instructions: str, model: str = ASSISTANT_MODEL,
+                 on_token: Optional[Callable[[str, str], None]] = None, stream: bool = STREAM_RUNS,
+                 registry: Optional[AssistantRegistry] = None, response_cache: Optional[ResponseCache] = None):
         self.client = client
+        self.role = role
+        self.instructions = instructions
+        self.model = model
+        self.on_token = on_token
+        self.stream = stream
+        self.registry = registry
+        # A reused thread holds earlier runs' messages, which the cache keys can't account for
+        self.response_cache = response_cache if registry is None or registry.thread_policy == "recycle" else None
+        self.assistant_id = None
+        self.thread_id = None
+        self._setup_lock = asyncio.Lock()
+        self._context = ""
+        self._pending_messages = []
+        self._parent = None
+        self.last_prompt = None
+
+    def fork(self, label: str) -> "Assistant":
+        """
+        Same assistant on a thread of its own, for requests that run alongside this one
+
+        A thread runs one request at a time, so concurrent requests each need a
+        thread. The fork's thread starts empty; discard it with close_thread().
+        """
+        fork = copy.copy(self)
+        fork.role = label
+        fork.registry = None
+        fork.assistant_id = fork.thread_id = None
+        fork._setup_lock = asyncio.Lock()
+        fork._context = ""
+        fork._pending_messages = []
+        fork._parent = self
+        fork.last_prompt = None
+        return fork
+
+    async def close_thread(self) -> None:
+        """Delete this instance's thread"""
+        if self.thread_id is not None:
+            try:
+                await self.client.beta.threads.delete(self.thread_id)
+            except NotFoundError:
+                pass
+            self.thread_id = None
+
+    async def _setup_assistant(self) -> None:
+        """Get the assistant, without a thread; a fork takes its parent's current one"""
+        async with self._setup_lock:
+            if self._parent is not None:
+                await self._parent._setup_assistant()
+                self.assistant_id = self._parent.assistant_id
+                return
+            if self.assistant_id is not None:
+                return
+            if self.registry is not None:
+                self.assistant_id = await self.registry.acquire_assistant(self.role, self.instructions, self.model)
+                return
+            assistant = await self.client.beta.assistants.create(
+                name=f"Lecture {self.role}",
+                instructions=self.instructions,
+                model=self.model
+            )
+            self.assistant_id = assistant.id
+
+    async def setup(self) -> None:
+        """
+        Get the assistant and this instance's thread unless it already has them
+
+        Forks only need their parent's assistant, so a parent whose requests
+        all run on forks never gets a thread of its own.
+        """
+        await self._setup_assistant()
+        async with self._setup_lock:
+            if self.thread_id is not None:
+                return
+            if self.registry is not None:
+                self.thread_id = await self.registry.acquire_thread(self.instructions, self.model)
+            else:
+                self.thread_id = (await self.client.beta.threads.create()).id
+
+    def _owner(self) -> "Assistant":
+        """The instance that was not forked from another, which owns the assistant"""
+        return self if self._parent is None else self._parent._owner()
+
+    async def _forget_assistant(self, stale_assistant_id: Optional[str]) -> None:
+        """Drop a registered assistant that was deleted elsewhere, unless another request already did"""
+        async with self._setup_lock:
+            if self.assistant_id == stale_assistant_id:
+                await self.registry.forget(self.instructions, self.model)
+                self.assistant_id = self.thread_id = None
 
     async def send_message(self, content: str) -> str:
         """Send message and get response asynchronously"""
-        # Create message
-        self.client.beta.threads.messages.create(
-            thread_id=self.thread.id,
-            role="user",
-            content=content
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.key(self.model, self.instructions, self._context, content)
+            reply = self.response_cache.get(cache_key)
+            if reply is not None:
+                self.replay(content, reply)
+                return reply
+
+        await self.setup()
+        try:
+            reply = await self._send(content)
+        except NotFoundError:
+            owner = self._owner()
+            if owner.registry is None:
+                raise
+            # The registered assistant or thread was deleted elsewhere; register new ones
+            await owner._forget_assistant(self.assistant_id)
+            if self is not owner:
+                await self.close_thread()
+                self.assistant_id = None
+            await self.setup()
+            reply = await self._send(content)
+
+        self._context = context_after(self._context, content, reply)
+        self.last_prompt = content
+        if cache_key is not None:
+            self.response_cache.put(cache_key, reply)
+        return reply
+
+    def replay(self, content: str, reply: str) -> None:
+        """
+        Treat an earlier reply as this thread's answer to content without calling the API
+
+        The exchange reaches the thread with the next request that does call
+        the API, so that request sees the same conversation.
+        """
+        self._pending_messages += [{"role": "user", "content": content},
+                                   {"role": "assistant", "content": reply}]
+        self._context = context_after(self._context, content, reply)
+        self.last_prompt = content
+
+    @property
+    def context(self) -> str:
+        """Hash of everything said on this thread so far"""
+        return self._context
+
+    async def _send(self, content: str) -> str:
+        # The message goes in with the run, after any cached exchanges not yet on the thread
+        messages = self._pending_messages + [{"role": "user", "content": content}]
+
+        try:
+            if self.stream:
+                reply = await asyncio.wait_for(self._stream_run(messages), RUN_TIMEOUT_SECONDS)
+            else:
+                reply = await asyncio.wait_for(self._poll_run(messages), RUN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Assistant response timed out after {RUN_TIMEOUT_SECONDS:.0f}s")
+        self._pending_messages = []
+        return reply
+
+    async def _stream_run(self, messages: list) -> str:
+        """Run the assistant with streamed events and return the reply when the run completes"""
+        stream = await self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            additional_messages=messages,
+            stream=True
         )
-        
+        pieces = []
+        reply = None
+        async with stream:
+            async for event in stream:
+                if event.event == "thread.message.delta":
+                    for block in event.data.delta.content or []:
+                        if block.type == "text" and block.text and block.text.value:
+                            pieces.append(block.text.value)
+                            if self.on_token is not None:
+                                self.on_token(self.role, block.text.value)
+                elif event.event == "thread.message.completed":
+                    reply = event.data.content[0].text.value
+                elif event.event == "thread.run.completed":
+                    return reply if reply is not None else "".join(pieces)
+                elif event.event in [f"thread.run.{status}" for status in RUN_FAILED_STATUSES]:
+                    raise Exception(f"Assistant run {event.event.rsplit('.', 1)[1]}")
+                elif event.event == "error":
+                    raise Exception(f"Assistant run failed: {event.data.message}")
+        raise Exception("Assistant run stream ended before the run completed")
+
+    async def _poll_run(self, messages: list) -> str:
+        """Run the assistant and poll its status with exponential backoff, at most RUN_POLL_MAX_SECONDS apart"""
         # Create run
-        run = self.client.beta.threads.runs.create(
-            thread_id=self.thread.id,
-            assistant_id=self.assistant.id
+        run = await self.client.beta.threads.runs.create(
+            thread_id=self.thread_id,
+            assistant_id=self.assistant_id,
+            additional_messages=messages
         )
         
         # Check status with exponential backoff
-        max_retries = 10
-        retry_delay = 1
+        retry_delay = INITIAL_RETRY_DELAY
         
-        for attempt in range(max_retries):
-            run_status = self.client.beta.threads.runs.retrieve(
-                thread_id=self.thread.id,
+        while True:
+            run_status = await self.client.beta.threads.runs.retrieve(
+                thread_id=self.thread_id,
                 run_id=run.id
             )
             
             if run_status.status == "completed":
-                messages = self.client.beta.threads.messages.list(
-                    thread_id=self.thread.id
+                messages = await self.client.beta.threads.messages.list(
+                    thread_id=self.thread_id
                 )
                 return messages.data[0].content[0].text.value
                 
-            elif run_status.status == "failed":
-                raise Exception("Assistant run failed")
+            elif run_status.status in RUN_FAILED_STATUSES:
+                raise Exception(f"Assistant run {run_status.status}")
                 
             await asyncio.sleep(retry_delay)
-            retry_delay *= 1.5  # Exponential backoff
-            
-        raise TimeoutError("Assistant response timed out")
+            retry_delay = min(retry_delay * BACKOFF_FACTOR, RUN_POLL_MAX_SECONDS)  # Exponential backoff
 
 class Teacher(Assistant):
     """Teacher Assistant for creating lecture notes"""
-    def __init__(self, client: OpenAI):
-        super().__init__(client, "Teacher", TEACHER_INSTRUCTIONS)
+    def __init__(self, client: AsyncOpenAI, **options):
+        super().__init__(client, "Teacher", TEACHER_INSTRUCTIONS, **options)
 
     async def create_initial_notes(self, transcript: str) -> str:
-        """Create initial lecture notes with enhanced visual and comparative elements"""
-        return await self.send_message(
-            INITIAL_NOTES_PROMPT.format(transcript=transcript)
+        """
+        Create initial lecture notes with enhanced visual and comparative elements
+
+        Transcripts longer than MAP_REDUCE_MIN_TOKENS are split into chunks of
+        NOTES_CHUNK_TOKENS on paragraph or sentence boundaries. Notes for the
+        chunks are written concurrently, at most NOTES_MAX_CONCURRENCY at a
+        time on separate threads, and then merged on the teacher's own thread
+        so the later steps see the merged notes as usual.
+        """
+        if estimate_tokens(transcript) <= MAP_REDUCE_MIN_TOKENS:
+            return await self.send_message(
+                INITIAL_NOTES_PROMPT.format(transcript=transcript)
+            )
+
+        chunks = chunk_transcript(transcript, NOTES_CHUNK_TOKENS)
+        print(f"Writing notes for {len(chunks)} transcript parts, {NOTES_MAX_CONCURRENCY} at a time")
+        semaphore = asyncio.Semaphore(NOTES_MAX_CONCURRENCY)
+
+        async def notes_for_chunk(part: int, chunk: str) -> str:
+            async with semaphore:
+                worker = self.fork(f"{self.role} (part {part}/{len(chunks)})")
+                try:
+                    return await worker.send_message(
+                        CHUNK_NOTES_PROMPT.format(part=part, parts=len(chunks), transcript=chunk)
+                    )
+                finally:
+                    await worker.close_thread()
+
+        partial_notes = await asyncio.gather(
+            *[notes_for_chunk(part, chunk) for part, chunk in enumerate(chunks, start=1)]
         )
+        return await self.send_message(REDUCE_NOTES_PROMPT.format(
+            partial_notes="\n\n".join(f"## Part {part}\n\n{notes}" for part, notes in enumerate(partial_notes, start=1))
+        ))
     
     async def add_missing_content(self, initial_notes: str) -> str:
         """Analyze initial notes and provide only missing major points and enhancements"""
@@ -93,16 +334,55 @@ class Teacher(Assistant):
             {MISSING_CONTENT_PROMPT}""")
 
     async def combine_notes(self, enhanced_notes: str, missing_content: str) -> str:
-        """Combine enhanced notes with missing content in a structured way"""
-        return await self.send_message(
-            COMBINE_NOTES_PROMPT.format(enhanced_notes=enhanced_notes, missing_content=missing_content)
-        )
+        """
+        Combine enhanced notes with missing content in a structured way
 
-    async def answer_student_questions(self, student_questions: str) -> str:
-        """Generate answers for student questions"""
-        return await self.send_message(
-            QA_PROMPT.format(student_questions=student_questions)
-        )
+        With LOCAL_NOTES_MERGE, each section of the missing content is inserted
+        under the heading of the notes with the most similar title, without
+        calling the API. Only sections that match no heading are sent, along
+        with the notes' outline rather than the notes, for the assistant to
+        choose their place on a thread of its own.
+        """
+        if not LOCAL_NOTES_MERGE:
+            return await self.send_message(
+                COMBINE_NOTES_PROMPT.format(enhanced_notes=enhanced_notes, missing_content=missing_content)
+            )
+
+        notes, unplaced = merge_sections(enhanced_notes, missing_content)
+        print(f"Merged missing content locally, {len(unplaced)} sections left to place")
+        if unplaced:
+            await self._place_sections(notes, unplaced)
+        return notes.render()
+
+    async def _place_sections(self, notes, fragments: list) -> None:
+        """Ask where each fragment belongs and attach it there; unanswered ones go at the end"""
+        sections, headings = outline(notes)
+        worker = self.fork(f"{self.role} (placement)")
+        try:
+            reply = await worker.send_message(PLACE_SECTIONS_PROMPT.format(
+                outline=headings,
+                fragments="\n\n".join(f"Fragment {number}:\n{fragment.render()}"
+                                       for number, fragment in enumerate(fragments, start=1))
+            ))
+        finally:
+            await worker.close_thread()
+
+        choices = {int(number): choice.lower()
+                   for number, choice in re.findall(r"(\d+)\s*:\s*(\d+|x)\b", reply, re.IGNORECASE)}
+        for number, fragment in enumerate(fragments, start=1):
+            choice = choices.get(number, "0")
+            if choice == "x":
+                continue
+            index = int(choice)
+            target = sections[index - 1] if 1 <= index <= len(sections) else end_section(notes)
+            target.attach(fragment)
+
+    async def answer_student_questions(self, student_questions: str, notes: Optional[str] = None) -> str:
+        """Generate answers for student questions, given the notes unless the thread already has them"""
+        prompt = QA_PROMPT.format(student_questions=student_questions)
+        if notes is not None:
+            prompt = f"Lecture Notes:\n{notes}\n\n{prompt}"
+        return await self.send_message(prompt)
 
     def format_qa_section(self, questions: str, answers: str) -> str:
         """Format Q&A section with enhanced visual elements"""
@@ -122,8 +402,8 @@ class Teacher(Assistant):
 
 class Student(Assistant):
     """Student Assistant for reviewing lecture notes"""
-    def __init__(self, client: OpenAI):
-        super().__init__(client, "Student", STUDENT_INSTRUCTIONS)
+    def __init__(self, client: AsyncOpenAI, **options):
+        super().__init__(client, "Student", STUDENT_INSTRUCTIONS, **options)
     
     async def review_notes(self, notes: str) -> str:
         """Review lecture notes and provide questions"""
@@ -132,55 +412,236 @@ class Student(Assistant):
         )
 
 class LectureNotesCreator:
-    """Main class for creating lecture notes"""
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-        self.teacher = Teacher(self.client)
-        self.student = Student(self.client)
-
-    async def create_notes(self, transcript_path: str, output_folder: str) -> None:
-        """Create lecture notes with clear separation of initial and missing content"""
+    """
+    Main class for creating lecture notes
+
+    Teacher and student share one AsyncOpenAI client and so one pool of
+    keep-alive connections. Use it as an async context manager, or call close(),
+    so the pool is released on the event loop that opened it.
+
+    on_token(role, text) receives the replies' text as it streams in. With
+    use_registry, assistants are kept in the assistant registry and reused by
+    later runs. With use_response_cache, steps whose request is unchanged
+    since an earlier run reuse that run's reply.
+    """
+    def __init__(self, api_key: str, base_url: Optional[str] = OPENAI_BASE_URL,
+                 on_token: Optional[Callable[[str, str], None]] = None,
+                 use_registry: bool = USE_ASSISTANT_REGISTRY, use_response_cache: bool = USE_RESPONSE_CACHE):
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=OPENAI_TIMEOUT)
+        self.registry = AssistantRegistry(self.client) if use_registry else None
+        self.response_cache = ResponseCache() if use_response_cache else None
+        options = {"on_token": on_token, "registry": self.registry, "response_cache": self.response_cache}
+        self.teacher = Teacher(self.client, **options)
+        self.student = Student(self.client, **options)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self) -> None:
+        """Release this run's threads and close the pooled HTTP connections"""
+        try:
+            if self.registry is not None:
+                await asyncio.gather(self.registry.release(self.teacher.thread_id),
+                                     self.registry.release(self.student.thread_id))
+        finally:
+            await self.client.close()
+
+    async def create_notes(self, transcript_path: str, output_folder: str, use_cache: bool = USE_ARTIFACT_CACHE) -> None:
+        """
+        Create lecture notes with clear separation of initial and missing content
+
+        When the transcript is the one timestamped in output_folder and the
+        scene manifest is there too, each slide's part of the transcript is
+        marked so the notes can follow the slides.
+
+        Notes are cached by the transcript's content hash and the model and
+        prompts used, so the same transcript is only sent to the API once.
+
+        Each step's output in debug/ is a checkpoint recording a hash of the
+        step's inputs. A rerun into the same folder reuses every step whose
+        inputs are unchanged and resumes at the first one that changed or
+        never completed.
+
+        Steps run as a dependency graph (see _note_steps), and the wall-clock
+        time and critical path of each run are printed.
+        """
+        transcript = self._read_file(transcript_path)
+        slides = load_slide_index(output_folder)
+        if slides is not None and slides.text() == transcript:
+            transcript = slides.sectioned_text()
+
+        cache = ArtifactCache()
+        cache_key = self._cache_key(transcript)
+        if use_cache and cache.fetch("notes", cache_key, output_folder) is not None:
+            print(f"\n💾 Reused cached notes in: {output_folder}")
+            return
+
         try:
             print("\n📚 Starting lecture notes creation...")
-            
-            # Step 1: Initial notes creation
-            print("\n👨‍🏫 Teacher creating initial notes...")
-            transcript = self._read_file(transcript_path)
-            initial_notes = await self.teacher.create_initial_notes(transcript)
-            self._save_intermediate("step1_initial_notes.md", initial_notes, output_folder)
-            
-            # Step 2: Identify missing content
-            print("\n👨‍🏫 Teacher identifying missing content...")
-            missing_content = await self.teacher.add_missing_content(initial_notes)
-            self._save_intermediate("step2_missing_content.md", missing_content, output_folder)
-            
-            # Step 3: Create final combined notes
-            print("\n👨‍🏫 Teacher combining notes...")
-            combined_notes = await self.teacher.combine_notes(initial_notes, missing_content)
-            self._save_intermediate("step3_combined_notes.md", combined_notes, output_folder)
-            
-            # Step 4: Student review
-            print("\n👨‍🎓 Student reviewing notes...")
-            student_questions = await self.student.review_notes(combined_notes)
-            self._save_intermediate("step4_student_questions.md", student_questions, output_folder)
-            
-            # Step 5: Add Q&A section
-            if "SATISFIED" not in student_questions:
-                print("\n👨‍🏫 Teacher adding Q&A section...")
-                qa_answers = await self.teacher.answer_student_questions(student_questions)
-                final_notes_with_qa = combined_notes + "\n\n" + self.teacher.format_qa_section(student_questions, qa_answers)
+            steps = self._note_steps(output_folder, PARALLEL_NOTE_STEPS)
+            values, timings = await run_steps(steps, {"transcript": transcript})
+            report_timings(steps, timings)
+
+            combined_notes, qa_answers = values["combined_notes"], values["qa_answers"]
+            if qa_answers is not None:
+                final_notes_with_qa = combined_notes + "\n\n" + self.teacher.format_qa_section(
+                    values["student_questions"], qa_answers)
             else:
-                print("\n✅ No questions from student. Notes are clear.")
                 final_notes_with_qa = combined_notes
             
             # Save final output
             self._save_output(final_notes_with_qa, output_folder)
+            if use_cache:
+                cache.store("notes", cache_key, output_folder, self._output_files(output_folder),
+                            transcript=os.path.basename(transcript_path))
             print(f"\n💾 All files saved to: {output_folder}")
+            if self.response_cache is not None:
+                print(f"🗄️ LLM response cache: {self.response_cache.stats()}")
             
         except Exception as e:
             print(f"\n❌ Error: {str(e)}")
             raise
 
+    def _note_steps(self, output_folder: str, parallel: bool) -> list:
+        """
+        The five note steps and the outputs each one needs
+
+        Sequentially, the teacher's steps share its thread and build on the
+        conversation so far, and the student reviews the combined notes. In
+        parallel, every step runs on a fresh thread with everything it needs in
+        its prompt. The student then reviews the initial notes while the teacher
+        looks for missing content, and the questions are answered while the
+        notes are combined.
+
+        Returns:
+            list: Steps producing initial_notes, missing_content, combined_notes,
+                student_questions and qa_answers (None when the student is satisfied)
+        """
+        teacher, student = self.teacher, self.student
+
+        async def run(filename, assistant, inputs, request):
+            """Run request(assistant) as a checkpointed step, on a thread of its own in parallel"""
+            if not parallel:
+                return await self._run_step(filename, assistant, output_folder, inputs, lambda: request(assistant))
+            worker = assistant.fork(f"{assistant.role} ({os.path.splitext(filename)[0]})")
+            try:
+                return await self._run_step(filename, worker, output_folder, inputs, lambda: request(worker))
+            finally:
+                await worker.close_thread()
+
+        async def initial_notes(transcript):
+            print("\n👨‍🏫 Teacher creating initial notes...")
+            return await run(INITIAL_NOTES_FILE, teacher,
+                             [INITIAL_NOTES_PROMPT, CHUNK_NOTES_PROMPT, REDUCE_NOTES_PROMPT, transcript],
+                             lambda assistant: assistant.create_initial_notes(transcript))
+
+        async def missing_content(initial_notes):
+            print("\n👨‍🏫 Teacher identifying missing content...")
+            return await run(MISSING_CONTENT_FILE, teacher, [MISSING_CONTENT_PROMPT, initial_notes],
+                             lambda assistant: assistant.add_missing_content(initial_notes))
+
+        async def combined_notes(initial_notes, missing_content):
+            print("\n👨‍🏫 Teacher combining notes...")
+            return await run(COMBINED_NOTES_FILE, teacher,
+                             [COMBINE_NOTES_PROMPT, PLACE_SECTIONS_PROMPT, LOCAL_NOTES_MERGE, SECTION_MATCH_THRESHOLD,
+                              initial_notes, missing_content],
+                             lambda assistant: assistant.combine_notes(initial_notes, missing_content))
+
+        async def student_questions(notes):
+            print("\n👨‍🎓 Student reviewing notes...")
+            return await run(STUDENT_QUESTIONS_FILE, student, [REVIEW_NOTES_PROMPT, notes],
+                             lambda assistant: assistant.review_notes(notes))
+
+        async def qa_answers(student_questions, notes):
+            if "SATISFIED" in student_questions:
+                print("\n✅ No questions from student. Notes are clear.")
+                return None
+            print("\n👨‍🏫 Teacher adding Q&A section...")
+            # On a fresh thread the teacher hasn't seen the notes yet
+            notes = notes if parallel else None
+            return await run(QA_ANSWERS_FILE, teacher, [QA_PROMPT, student_questions, notes],
+                             lambda assistant: assistant.answer_student_questions(student_questions, notes))
+
+        reviewed_notes = "initial_notes" if parallel else "combined_notes"
+        return [
+            Step("initial_notes", ("transcript",), initial_notes),
+            Step("missing_content", ("initial_notes",), missing_content),
+            Step("combined_notes", ("initial_notes", "missing_content"), combined_notes),
+            Step("student_questions", (reviewed_notes,), student_questions),
+            Step("qa_answers", ("student_questions", reviewed_notes), qa_answers),
+        ]
+
+    async def _run_step(self, filename: str, assistant: Assistant, output_folder: str, inputs: list,
+                        run: Callable) -> str:
+        """
+        Run one step, or take its output from a checkpoint written for the same inputs
+
+        The inputs hash covers the assistant's model, instructions and thread
+        history as well as the step's prompts and input texts. A restored
+        step's exchange is replayed onto the assistant's thread, so later
+        steps see the conversation they would have seen.
+        """
+        inputs_hash = hashlib.sha256(json.dumps(
+            [filename, assistant.model, assistant.instructions, assistant.context, inputs]
+        ).encode("utf-8")).hexdigest()
+        checkpoint = self._load_checkpoint(filename, inputs_hash, output_folder)
+        if checkpoint is not None:
+            prompt, output = checkpoint
+            if prompt is not None:
+                assistant.replay(prompt, output)
+            print(f"⏩ Inputs unchanged, reusing debug/{filename}")
+            return output
+
+        context = assistant.context
+        output = await run()
+        # A step that never sent to the assistant's thread (a local merge) has no exchange to replay
+        prompt = assistant.last_prompt if assistant.context != context else None
+        self._save_intermediate(filename, output, output_folder, inputs_hash, prompt)
+        return output
+
+    @staticmethod
+    def _load_checkpoint(filename: str, inputs_hash: str, output_folder: str) -> Optional[tuple]:
+        """(prompt, output) of a step saved with the given inputs hash, or None; prompt is None for local steps"""
+        debug_folder = os.path.join(output_folder, "debug")
+        name = os.path.splitext(filename)[0]
+        metadata_path = os.path.join(debug_folder, f"{name}_metadata.json")
+        try:
+            with open(metadata_path, 'r') as f:
+                if json.load(f).get("inputs_hash") != inputs_hash:
+                    return None
+            prompt_path = os.path.join(debug_folder, f"{name}_prompt.md")
+            prompt = None
+            if os.path.exists(prompt_path):
+                with open(prompt_path, 'r') as f:
+                    prompt = f.read()
+            with open(os.path.join(debug_folder, filename), 'r') as f:
+                return prompt, f.read()
+        except (OSError, ValueError):
+            return None
+
+    def _cache_key(self, transcript: str) -> str:
+        """Artifact cache key covering the transcript and everything sent with it"""
+        return artifact_key(
+            "notes",
+            hashlib.sha256(transcript.encode("utf-8")).hexdigest(),
+            model=self.teacher.model,
+            prompts=[TEACHER_INSTRUCTIONS, STUDENT_INSTRUCTIONS, INITIAL_NOTES_PROMPT, MISSING_CONTENT_PROMPT,
+                     COMBINE_NOTES_PROMPT, REVIEW_NOTES_PROMPT, QA_PROMPT, CHUNK_NOTES_PROMPT, REDUCE_NOTES_PROMPT,
+                     PLACE_SECTIONS_PROMPT],
+            chunking=[MAP_REDUCE_MIN_TOKENS, NOTES_CHUNK_TOKENS],
+            parallel_steps=PARALLEL_NOTE_STEPS,
+            merge=[LOCAL_NOTES_MERGE, SECTION_MATCH_THRESHOLD]
+        )
+
+    @staticmethod
+    def _output_files(output_folder: str) -> list:
+        """Relative paths of the notes, metadata and debug files written by create_notes"""
+        debug_files = sorted(os.listdir(os.path.join(output_folder, "debug")))
+        return ["lecture_notes.md", "metadata.json"] + [f"debug/{filename}" for filename in debug_files]
+
     @staticmethod
     def _read_file(path: str) -> str:
         """Read content from file"""
@@ -188,11 +649,24 @@ class LectureNotesCreator:
             return f.read()
 
     @staticmethod
-    def _save_intermediate(filename: str, content: str, output_folder: str) -> None:
-        """Save intermediate results to debug folder"""
+    def _save_intermediate(filename: str, content: str, output_folder: str, inputs_hash: Optional[str] = None,
+                           prompt: Optional[str] = None) -> None:
+        """
+        Save intermediate results to debug folder
+
+        With inputs_hash the result becomes a checkpoint: the prompt that produced
+        it is saved alongside, and the metadata holding the hash is written last.
+        """
         debug_folder = os.path.join(output_folder, "debug")
         os.makedirs(debug_folder, exist_ok=True)
         
+        prompt_path = os.path.join(debug_folder, f"{os.path.splitext(filename)[0]}_prompt.md")
+        if prompt is not None:
+            with open(prompt_path, 'w') as f:
+                f.write(prompt)
+        elif inputs_hash is not None and os.path.exists(prompt_path):
+            os.remove(prompt_path)  # Left by an earlier run of the step that did use the assistant
+        
         # Save content
         filepath = os.path.join(debug_folder, filename)
         with open(filepath, 'w') as f:
@@ -204,7 +678,8 @@ class LectureNotesCreator:
         metadata = {
             "filename": filename,
             "created_at": timestamp,
-            "file_size": len(content)
+            "file_size": len(content),
+            "inputs_hash": inputs_hash
         }
         with open(metadata_path, 'w') as f:
             json.dump(metadata, f, indent=2)
@@ -227,6 +702,7 @@ class LectureNotesCreator:
                 "debug/step2_missing_content.md": "Missing content",
                 "debug/step3_combined_notes.md": "Final combined notes",
                 "debug/step4_student_questions.md": "Student questions",
+                "debug/step5_qa_answers.md": "Answers to the student questions",
                 "lecture_notes.md": "Final lecture notes with Q&A"
             }
         }
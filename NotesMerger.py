@@ -0,0 +1,187 @@
+import difflib
+import re
+from constants import SECTION_MATCH_THRESHOLD
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+class Section:
+    """
+    A markdown heading, the lines under it up to its first subheading, and its subsections
+
+    The root of a document has level 0, no heading, and holds the text before
+    the first heading.
+    """
+    def __init__(self, level, title="", heading=None):
+        self.level = level
+        self.title = title
+        self.heading = heading
+        self.lines = []
+        self.children = []
+
+    def walk(self):
+        """This section and all its subsections in document order"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def has_text(self):
+        return any(line.strip() for line in self.lines) or bool(self.children)
+
+    def extend(self, lines):
+        """Adds lines after this section's own text, ahead of its subsections"""
+        while self.lines and not self.lines[-1].strip():
+            self.lines.pop()
+        if self.lines:
+            self.lines.append("")
+        self.lines += lines
+
+    def attach(self, section):
+        """Adds section as the last subsection, changing its heading levels to fit"""
+        section._set_level(self.level + 1 if self.level else max(section.level, 1))
+        self.children.append(section)
+
+    def _set_level(self, level):
+        shift = level - self.level
+        for section in self.walk():
+            section.level = min(6, max(1, section.level + shift))
+            if section.heading is not None and shift:
+                section.heading = f"{'#' * section.level} {section.title}"
+
+    def render(self):
+        own = "\n".join(([self.heading] if self.heading is not None else []) + self.lines).strip("\n")
+        blocks = ([own] if own else []) + [child.render() for child in self.children]
+        return "\n\n".join(block for block in blocks if block)
+
+
+def parse_sections(markdown):
+    """
+    Parses markdown into a tree of sections by heading level
+
+    Lines starting with '#' inside fenced code blocks are not headings.
+
+    Returns:
+        Section: Root of the tree
+    """
+    root = Section(0)
+    stack = [root]
+    in_fence = False
+    for line in markdown.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match is None:
+            stack[-1].lines.append(line)
+            continue
+        section = Section(len(match.group(1)), match.group(2), line)
+        while stack[-1].level >= section.level:
+            stack.pop()
+        stack[-1].children.append(section)
+        stack.append(section)
+    return root
+
+
+def _normalize(title):
+    """Lowercase words of a title without numbering, emphasis, emoji or punctuation"""
+    words = re.sub(r"[^\w\s]|_", " ", title.lower()).split()
+    while words and words[0].isdigit():
+        words.pop(0)
+    return " ".join(words)
+
+
+def _best_match(title, targets, threshold):
+    """The target section whose title is most similar to title, if similar enough"""
+    title = _normalize(title)
+    if not title:
+        return None
+    best, best_ratio = None, threshold
+    for section, normalized in targets:
+        matcher = difflib.SequenceMatcher(None, title, normalized)
+        if matcher.quick_ratio() < best_ratio:
+            continue
+        ratio = matcher.ratio()
+        # The first of equally similar headings wins
+        if ratio > best_ratio or (best is None and ratio == best_ratio):
+            best, best_ratio = section, ratio
+    return best
+
+
+def _merge(section, targets, threshold, parent):
+    """
+    Merges section into the notes and returns the part that could not be placed
+
+    A section whose title matches a heading of the notes is added under that
+    heading. Otherwise its subsections are matched one by one; what remains
+    goes under parent when there is one, or is returned.
+    """
+    target = _best_match(section.title, targets, threshold)
+    if target is not None:
+        target.extend(section.lines)
+        for child in section.children:
+            _merge(child, targets, threshold, target)
+        return None
+
+    children, section.children = section.children, []
+    for child in children:
+        left = _merge(child, targets, threshold, None)
+        if left is not None:
+            section.children.append(left)
+    if not section.has_text():
+        return None
+    if parent is not None:
+        parent.attach(section)
+        return None
+    return section
+
+
+def merge_sections(notes, additions, threshold=SECTION_MATCH_THRESHOLD):
+    """
+    Inserts each section of additions under the heading of notes with the most similar title
+
+    Titles are compared after dropping numbering, emphasis and punctuation,
+    with difflib similarity of at least threshold. Subsections of a placed
+    section that match no heading stay under it. Headings with no text of
+    their own, such as category titles, are dropped once their subsections
+    are placed.
+
+    Args:
+        notes (str): Markdown notes
+        additions (str): Markdown sections to add to the notes
+        threshold (float): Minimum title similarity, 0 to 1
+
+    Returns:
+        tuple: (Section tree of the merged notes, list of Sections that matched no heading)
+    """
+    root = parse_sections(notes)
+    # Only the notes' own headings are targets, never sections added from additions
+    targets = [(section, _normalize(section.title)) for section in root.walk() if section is not root]
+
+    extra = parse_sections(additions)
+    unplaced = []
+    if any(line.strip() for line in extra.lines):
+        preamble = Section(0)
+        preamble.lines = extra.lines
+        unplaced.append(preamble)
+    for section in extra.children:
+        left = _merge(section, targets, threshold, None)
+        if left is not None:
+            unplaced.append(left)
+    return root, unplaced
+
+
+def outline(root):
+    """
+    Lists the headings of the notes for choosing where content goes
+
+    Returns:
+        tuple: (Sections in document order, their titles numbered from 1 and indented by level)
+    """
+    sections = [section for section in root.walk() if section is not root]
+    return sections, "\n".join(f"{'  ' * (section.level - 1)}[{number}] {section.title}"
+                               for number, section in enumerate(sections, start=1))
+
+
+def end_section(root):
+    """Where content that belongs in no section goes: under the title when the notes have a single one"""
+    return root.children[0] if len(root.children) == 1 else root
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from constants import RESPONSE_CACHE_FOLDER, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_AGE_DAYS
+
+
+def context_after(context, prompt, reply):
+    """Hash of a thread's context after one more prompt and reply"""
+    return hashlib.sha256("\0".join((context, prompt, reply)).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of assistant replies
+
+    A reply is keyed by the model, the assistant instructions, the hash of
+    everything said earlier on the thread and the prompt itself, so it is only
+    reused when the request would have been exactly the same. Entries are
+    evicted least recently used first once the cache holds more than max_bytes,
+    and when they have not been used for max_age_days.
+    """
+    def __init__(self, folder=RESPONSE_CACHE_FOLDER, max_bytes=RESPONSE_CACHE_MAX_BYTES,
+                 max_age_days=RESPONSE_CACHE_MAX_AGE_DAYS):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(model, instructions, context, prompt):
+        identity = json.dumps([model, instructions, context, prompt])
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached reply or None, counting the hit or miss"""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                reply = json.load(f)["reply"]
+            os.utime(path)  # Last use, for LRU eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return reply
+
+    def put(self, key, reply):
+        partial_path = f"{self._path(key)}.partial"
+        with open(partial_path, "w", encoding="utf-8") as f:
+            json.dump({"reply": reply, "created_at": time.time()}, f)
+        os.replace(partial_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Drops entries unused for max_age_days, then the least recently used until under max_bytes"""
+        entries = []
+        for filename in os.listdir(self.folder):
+            if filename.endswith(".json"):
+                path = os.path.join(self.folder, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        cutoff = time.time() - self.max_age_days * 24 * 3600
+        total = sum(size for _, size, _ in entries)
+        for last_used, size, path in entries:
+            if last_used >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self):
+        return f"{self.hits} hits, {self.misses} misses"
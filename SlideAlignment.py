@@ -0,0 +1,114 @@
+import bisect
+import json
+import os
+from TranscriptJournal import TranscriptJournal
+from constants import SCENE_MANIFEST_FILE
+
+
+def load_scene_manifest(output_folder):
+    """
+    Returns the scenes recorded by the last frame extraction into output_folder
+
+    Returns:
+        list: Dicts with 'scene', 'frame_index', 'time' (seconds) and 'ssim',
+            or None when no manifest exists
+    """
+    manifest_path = os.path.join(output_folder, SCENE_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)["scenes"]
+
+
+def _format_time(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+class SlideTranscriptIndex:
+    """
+    Maps each slide to the transcript segments spoken while it was on screen
+
+    A slide is shown from its scene time until the next slide's. Each segment
+    belongs to the slide shown at its midpoint, found by binary search over the
+    slide start times; segments before the first slide go to the first slide.
+    Because segments are ordered and do not overlap, every slide owns one
+    contiguous run of segments, whose bounds are found by a second binary search.
+    Building the index is O(n log n) in the number of segments and slides.
+    """
+    def __init__(self, scenes, segments):
+        self.scenes = sorted(scenes, key=lambda scene: scene["time"])
+        self.segments = sorted(segments, key=lambda segment: segment["start"])
+        self._starts = [scene["time"] for scene in self.scenes]
+        self._positions = {scene["scene"]: position for position, scene in enumerate(self.scenes)}
+
+        owners = [
+            max(0, bisect.bisect_right(self._starts, (segment["start"] + segment["end"]) / 2) - 1)
+            for segment in self.segments
+        ]
+        self._bounds = [bisect.bisect_left(owners, position) for position in range(len(self.scenes) + 1)]
+
+    def __contains__(self, scene_number):
+        return scene_number in self._positions
+
+    def scene_at(self, seconds):
+        """Number of the slide on screen at the given time"""
+        position = max(0, bisect.bisect_right(self._starts, seconds) - 1)
+        return self.scenes[position]["scene"]
+
+    def segments_for(self, scene_number):
+        position = self._positions[scene_number]
+        return self.segments[self._bounds[position]:self._bounds[position + 1]]
+
+    def text_for(self, scene_number):
+        return "".join(segment["text"] for segment in self.segments_for(scene_number)).strip()
+
+    def span(self, scene_number):
+        """(start, end) in seconds of the time the slide was on screen"""
+        position = self._positions[scene_number]
+        if position + 1 < len(self.scenes):
+            end = self._starts[position + 1]
+        else:
+            end = self.segments[-1]["end"] if self.segments else self._starts[position]
+        return self._starts[position], end
+
+    def sections(self):
+        """Per-slide transcript: dicts with 'scene', 'start', 'end' and 'text'"""
+        sections = []
+        for scene in self.scenes:
+            start, end = self.span(scene["scene"])
+            sections.append({"scene": scene["scene"], "start": start, "end": end,
+                             "text": self.text_for(scene["scene"])})
+        return sections
+
+    def text(self):
+        """The transcript text the index was built from"""
+        return "".join(segment["text"] for segment in self.segments)
+
+    def sectioned_text(self):
+        """The transcript with a '[Slide N, mm:ss]' marker before each slide's text"""
+        return "\n\n".join(
+            f"[Slide {section['scene']}, {_format_time(section['start'])}]\n{section['text']}"
+            for section in self.sections() if section["text"]
+        )
+
+
+def load_slide_index(output_folder):
+    """
+    Builds the slide index from the scene manifest and transcript journal in output_folder
+
+    Scenes whose image was deleted during review are left out, so their text
+    joins the slide shown before them.
+
+    Returns:
+        SlideTranscriptIndex: The index, or None without scenes or timestamped segments
+    """
+    scenes = load_scene_manifest(output_folder)
+    if not scenes:
+        return None
+    scenes = [scene for scene in scenes
+              if os.path.exists(os.path.join(output_folder, f"scene_{scene['scene']}.png"))]
+    segments = TranscriptJournal(output_folder).load()
+    if not scenes or not segments:
+        return None
+    return SlideTranscriptIndex(scenes, segments)
@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+from constants import (
+    SLIDE_REGION_SAMPLES,
+    SLIDE_REGION_GRID_WIDTH,
+    SLIDE_REGION_MOTION_THRESHOLD,
+    SLIDE_REGION_MOTION_RATIO,
+    SLIDE_REGION_MIN_AREA
+)
+
+
+def detection_settings():
+    """The parameters that decide the detected slide region, for keying cached results"""
+    return {"samples": SLIDE_REGION_SAMPLES, "grid_width": SLIDE_REGION_GRID_WIDTH,
+            "motion_threshold": SLIDE_REGION_MOTION_THRESHOLD, "motion_ratio": SLIDE_REGION_MOTION_RATIO,
+            "min_area": SLIDE_REGION_MIN_AREA}
+
+
+def _largest_static_rectangle(static):
+    """
+    Largest axis-aligned rectangle of True cells in a 2D boolean grid
+
+    Uses the row-by-row histogram method, so it runs in O(rows * cols).
+
+    Returns:
+        tuple: (x, y, w, h) in grid cells, or None if no cell is static
+    """
+    rows, cols = static.shape
+    heights = np.zeros(cols, dtype=int)
+    best, best_area = None, 0
+    for row in range(rows):
+        heights = np.where(static[row], heights + 1, 0)
+        stack = []
+        for col in range(cols + 1):
+            height = heights[col] if col < cols else 0
+            start = col
+            while stack and stack[-1][1] >= height:
+                start, top = stack.pop()
+                area = top * (col - start)
+                if area > best_area:
+                    best_area = area
+                    best = (start, row - top + 1, col - start, top)
+            stack.append((start, height))
+    return best
+
+
+def detect_slide_region(video_path, samples=SLIDE_REGION_SAMPLES, grid_width=SLIDE_REGION_GRID_WIDTH,
+                        motion_threshold=SLIDE_REGION_MOTION_THRESHOLD, motion_ratio=SLIDE_REGION_MOTION_RATIO,
+                        min_area=SLIDE_REGION_MIN_AREA):
+    """
+    Finds the part of the frame that holds the slides
+
+    Pairs of frames half a second apart are taken at evenly spaced points in the
+    video. Slide content only changes at the occasional slide transition, while a
+    presenter webcam or a moving cursor changes in most pairs. Grid cells that
+    move in more than motion_ratio of the pairs are excluded and the largest
+    rectangle of remaining cells is returned.
+
+    Args:
+        video_path (str): Path to the video file
+        samples (int): Number of frame pairs to compare
+        grid_width (int): Width of the motion grid in cells
+        motion_threshold (int): Gray level difference counted as motion
+        motion_ratio (float): Fraction of pairs above which a cell counts as moving
+        min_area (float): Smallest accepted region as a fraction of the frame
+
+    Returns:
+        tuple: (x, y, w, h) in pixels, or None if the whole frame should be compared
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    gap = max(1, round(fps / 2))
+
+    motion = None
+    pairs = 0
+    for k in range(1, samples + 1):
+        position = frame_count * k // (samples + 1)
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+        ret, first = cap.read()
+        for _ in range(gap - 1):
+            ret = ret and cap.grab()
+        ret, second = cap.read() if ret else (False, None)
+        if not ret:
+            continue
+
+        frame_height, frame_width = first.shape[:2]
+        grid_height = max(1, round(frame_height * grid_width / frame_width))
+        # Diff at 4x the grid resolution so fine, noisy motion is not averaged away,
+        # then mark a cell as moving if any of its pixels moved
+        fine_size = (grid_width * 4, grid_height * 4)
+        fine = [
+            cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), fine_size, interpolation=cv2.INTER_AREA)
+            for frame in (first, second)
+        ]
+        fine_moved = (cv2.absdiff(fine[0], fine[1]) > motion_threshold).astype(np.float32)
+        moved = cv2.resize(fine_moved, (grid_width, grid_height), interpolation=cv2.INTER_AREA) > 0
+        motion = moved.astype(np.int32) if motion is None else motion + moved
+        pairs += 1
+    cap.release()
+
+    if not pairs:
+        return None
+
+    moving = (motion / pairs) > motion_ratio
+    if not moving.any():
+        return None
+    # Grow moving areas by one cell so their blurred edges stay outside the region
+    moving = cv2.dilate(moving.astype(np.uint8), np.ones((3, 3), np.uint8)) > 0
+
+    rectangle = _largest_static_rectangle(~moving)
+    if rectangle is None or rectangle[2] * rectangle[3] < min_area * moving.size:
+        return None
+
+    x, y, w, h = rectangle
+    scale_x = frame_width / moving.shape[1]
+    scale_y = frame_height / moving.shape[0]
+    region = (round(x * scale_x), round(y * scale_y), round(w * scale_x), round(h * scale_y))
+    print(f"Slide region detected: x={region[0]}, y={region[1]}, w={region[2]}, h={region[3]} "
+          f"({pairs} frame pairs, {moving.mean():.0%} of the frame moving)")
+    return region
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, NamedTuple, Tuple
+
+
+class Step(NamedTuple):
+    """A unit of work: run(*inputs) is awaited with the values named in inputs once they are all ready"""
+    name: str
+    inputs: Tuple[str, ...]
+    run: Callable[..., Awaitable]
+
+
+async def run_steps(steps, values=None):
+    """
+    Runs steps as a dependency graph, each as soon as its inputs are ready
+
+    Steps with no path between them run concurrently. A step's inputs may name
+    other steps or keys of values, which holds inputs known up front.
+
+    Args:
+        steps (list): Step definitions
+        values (dict): Inputs available before any step runs
+
+    Returns:
+        tuple: (dict of every value by name, dict of step name -> (start, end) in seconds from the start)
+    """
+    values = dict(values or {})
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        missing = [name for name in step.inputs if name not in by_name and name not in values]
+        if missing:
+            raise ValueError(f"Step '{step.name}' depends on unknown inputs: {missing}")
+
+    start_time = time.perf_counter()
+    timings = {}
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def run(step):
+        inputs = [await tasks[name] if name in tasks else values[name] for name in step.inputs]
+        started = time.perf_counter() - start_time
+        result = await step.run(*inputs)
+        timings[step.name] = (started, time.perf_counter() - start_time)
+        return result
+
+    for step in steps:
+        tasks[step.name] = asyncio.ensure_future(run(step))
+    try:
+        results = await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    values.update(zip(tasks.keys(), results))
+    return values, timings
+
+
+def critical_path(steps, timings):
+    """
+    The chain of dependent steps with the largest total run time
+
+    Returns:
+        tuple: (list of step names along the path, summed run time in seconds)
+    """
+    by_name = {step.name: step for step in steps}
+    finish = {}
+
+    def longest(name):
+        if name not in finish:
+            start, end = timings[name]
+            before = max((longest(dependency) for dependency in by_name[name].inputs if dependency in by_name),
+                         key=lambda path: path[1], default=([], 0.0))
+            finish[name] = (before[0] + [name], before[1] + end - start)
+        return finish[name]
+
+    return max((longest(step.name) for step in steps), key=lambda path: path[1], default=([], 0.0))
+
+
+def report_timings(steps, timings):
+    """Prints wall-clock time, total step time and the critical path of a finished run"""
+    path, path_seconds = critical_path(steps, timings)
+    wall_seconds = max(end for _, end in timings.values()) if timings else 0.0
+    busy_seconds = sum(end - start for start, end in timings.values())
+    print(f"⏱️ Steps took {wall_seconds:.1f}s wall clock for {busy_seconds:.1f}s of step time; "
+          f"critical path {' → '.join(path)} = {path_seconds:.1f}s")
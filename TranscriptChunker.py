@@ -0,0 +1,64 @@
+import re
+from constants import CHARS_PER_TOKEN
+
+# A sentence ends at ., ! or ? followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text):
+    """Rough token count for English text: about four characters per token"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_long(text, max_tokens):
+    """Splits text that is longer than max_tokens on sentence ends, or on spaces as a last resort"""
+    pieces = [sentence for sentence in _SENTENCE_END.split(text) if sentence]
+    if len(pieces) == 1:
+        words = text.split(" ")
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        pieces, current = [], ""
+        for word in words:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        pieces.append(current)
+        return pieces
+    return [piece for sentence in pieces
+            for piece in (_split_long(sentence, max_tokens) if estimate_tokens(sentence) > max_tokens else [sentence])]
+
+
+def chunk_transcript(transcript, max_tokens):
+    """
+    Splits a transcript into chunks of at most max_tokens estimated tokens
+
+    Chunks end on paragraph boundaries (blank lines, such as the breaks between
+    slide sections) where possible, otherwise on sentence ends. Only a single
+    sentence longer than max_tokens is cut between words.
+
+    Args:
+        transcript (str): Transcript text
+        max_tokens (int): Token budget of each chunk
+
+    Returns:
+        list: Chunk texts in transcript order
+    """
+    # (separator before the unit, unit text): paragraphs join with a blank line, sentences with a space
+    units = []
+    for paragraph in re.split(r"\n\s*\n", transcript.strip()):
+        if not paragraph:
+            continue
+        pieces = _split_long(paragraph, max_tokens) if estimate_tokens(paragraph) > max_tokens else [paragraph]
+        units.extend(("\n\n" if i == 0 else " ", piece) for i, piece in enumerate(pieces))
+
+    chunks = []
+    current = ""
+    for separator, unit in units:
+        if current and estimate_tokens(current) + estimate_tokens(unit) > max_tokens:
+            chunks.append(current)
+            current = ""
+        current = f"{current}{separator}{unit}" if current else unit
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,107 @@
+import json
+import os
+from constants import TRANSCRIPT_JOURNAL_FILE
+
+
+class TranscriptJournal:
+    """
+    Append-only JSONL record of transcribed segments
+
+    The first line is a header identifying the audio and model. Each transcribed
+    chunk appends its segments followed by a checkpoint line holding the audio
+    offset (in seconds) transcribed so far, and a final line marks the journal
+    complete. Lines after the last checkpoint belong to an interrupted chunk and
+    are dropped when the journal is reopened.
+    """
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, TRANSCRIPT_JOURNAL_FILE)
+        self.segments = []
+        self.offset = 0.0
+        self.complete = False
+        self._file = None
+
+    def open(self, header):
+        """
+        Loads the completed part of an existing journal for the same header, or
+        starts a new one, and opens it for appending
+
+        Args:
+            header (dict): Identity of the transcription (audio hash, model, ...)
+        """
+        resume_at = self._read(header)
+        if resume_at is None:
+            self.segments, self.offset, self.complete = [], 0.0, False
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"type": "header", **header}) + "\n")
+        else:
+            # Drop any half-written chunk after the last checkpoint
+            with open(self.path, "r+", encoding="utf-8") as f:
+                f.truncate(resume_at)
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def load(self):
+        """
+        Reads the journaled segments without opening the journal for writing
+
+        Returns:
+            list: Segments of every checkpointed chunk, empty when there is no journal
+        """
+        self._read(None)
+        return self.segments
+
+    def _read(self, header):
+        """
+        Returns the byte length of the journal up to its last checkpoint, or None to start over
+
+        A header of None accepts a journal written for any audio and model.
+        """
+        if not os.path.exists(self.path):
+            return None
+        segments, pending = [], []
+        resume_at = None
+        with open(self.path, "rb") as f:
+            for raw_line in iter(f.readline, b""):
+                try:
+                    entry = json.loads(raw_line)
+                except ValueError:
+                    break
+                if entry["type"] == "header":
+                    if header is not None and {k: v for k, v in entry.items() if k != "type"} != header:
+                        return None
+                    resume_at = f.tell()
+                elif entry["type"] == "segment":
+                    pending.append({k: v for k, v in entry.items() if k != "type"})
+                elif entry["type"] == "checkpoint":
+                    segments.extend(pending)
+                    pending = []
+                    self.offset = entry["offset"]
+                    resume_at = f.tell()
+                elif entry["type"] == "complete":
+                    self.complete = True
+                    resume_at = f.tell()
+        self.segments = segments
+        return resume_at
+
+    def append_chunk(self, segments, offset):
+        """Records a finished chunk and makes it durable before returning"""
+        for segment in segments:
+            self._file.write(json.dumps({"type": "segment", **segment}) + "\n")
+        self._file.write(json.dumps({"type": "checkpoint", "offset": offset}) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.segments.extend(segments)
+        self.offset = offset
+
+    def mark_complete(self):
+        self._file.write(json.dumps({"type": "complete"}) + "\n")
+        self._file.flush()
+        self.complete = True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def text(self):
+        return "".join(segment["text"] for segment in self.segments)
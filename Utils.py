@@ -1,5 +1,7 @@
 import os
 import shutil
+import hashlib
+import threading
 
 def get_output_folder(video_filename):
     """
@@ -34,4 +36,39 @@ def extract_scene_number(filename):
         # Extract number between 'scene_' and '.png'
         return int(filename.split('_')[1].split('.')[0])
     except (IndexError, ValueError):
-        return 0 
\ No newline at end of file
+        return 0 
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """
+    Streaming SHA-256 of a file's contents
+
+    Args:
+        path (str): Path to the file
+        chunk_size (int): Bytes read per step
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Content hashes of videos already hashed in this process, keyed by (path, size, mtime)
+_hash_cache = {}
+_hash_cache_lock = threading.Lock()
+
+
+def video_content_hash(video_path):
+    """SHA-256 of the video file, computed once per file version per process"""
+    stat = os.stat(video_path)
+    key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_cache_lock:
+        if key in _hash_cache:
+            return _hash_cache[key]
+    digest = file_hash(video_path)
+    with _hash_cache_lock:
+        _hash_cache[key] = digest
+    return digest
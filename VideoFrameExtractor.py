@@ -1,55 +1,974 @@
 import cv2
+import json
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from skimage.metrics import structural_similarity as ssim
 from tqdm import tqdm
+from constants import (
+    FRAME_SAMPLING_MODE,
+    SAMPLING_MODES,
+    CHANGE_DETECTOR,
+    CHANGE_DETECTORS,
+    COMPARE_WIDTH,
+    PIXEL_DIFF_GATE_SCALE,
+    EXTRACTION_WORKERS,
+    PIPELINED_EXTRACTION,
+    PIPELINE_QUEUE_SIZE,
+    WRITER_THREADS,
+    BUILD_SIGNATURE_INDEX,
+    ADAPTIVE_STRIDE_SECONDS,
+    ADAPTIVE_SETTLE_FRAMES,
+    SLIDE_REGION,
+    SKIP_BLANK_FRAMES,
+    DECODE_BACKEND,
+    DECODE_BACKENDS,
+    KEYFRAMES_ONLY,
+    USE_ARTIFACT_CACHE,
+    SCENE_MANIFEST_FILE
+)
+from ArtifactCache import ArtifactCache, artifact_key
+from BlankFrameClassifier import classifier_settings, is_blank_frame
+from FFmpegFrameSource import FFmpegFrameSource
+from FrameSignatureIndex import FrameSignatureIndex, downscale_gray, scale_region, thumbnail_shape
+from SlideRegionDetector import detect_slide_region, detection_settings
+from Utils import video_content_hash
 
-def extract_frames(video_path, output_folder, skip_frames, ssim_threshold):
+
+class ChangeDetector:
+    """
+    Decides whether a sampled frame starts a new scene
+
+    Frames are compared in grayscale, downscaled to compare_width. 'ssim' runs
+    SSIM on every sample. 'tiered' first rejects frames whose mean absolute
+    pixel difference is below pixel_diff_gate and runs the same SSIM only on the
+    remaining candidates. The gate is an approximation: a change that moves few
+    pixels (a new bullet line on a large slide) can fall below it while SSIM
+    would count it, so 'tiered' may save fewer scenes than 'ssim'.
+    compare_detectors measures how often the two disagree on a video.
+
+    By default the gate is PIXEL_DIFF_GATE_SCALE * (1 - ssim_threshold): the
+    stricter the threshold, the smaller the differences that must reach SSIM.
+    A threshold of 1 disables the gate.
+
+    When roi is given as (x, y, w, h), only that part of each frame is compared.
+    roi is in pixels of frame_shape (height, width), which defaults to the size
+    of the frames passed in. With skip_blank, candidates that the local
+    classifier finds blank (black, faded or empty) are never saved as scenes.
+    """
+    def __init__(self, ssim_threshold, detector=CHANGE_DETECTOR, compare_width=COMPARE_WIDTH,
+                 pixel_diff_gate=None, roi=None, skip_blank=SKIP_BLANK_FRAMES, frame_shape=None):
+        if detector not in CHANGE_DETECTORS:
+            raise ValueError(f"Unknown change detector: {detector}. Expected one of {CHANGE_DETECTORS}")
+        self.ssim_threshold = ssim_threshold
+        self.detector = detector
+        self.compare_width = compare_width
+        if pixel_diff_gate is None:
+            pixel_diff_gate = PIXEL_DIFF_GATE_SCALE * max(0.0, 1.0 - ssim_threshold)
+        self.pixel_diff_gate = pixel_diff_gate
+        self.roi = roi
+        self.frame_shape = frame_shape
+        self.skip_blank = skip_blank
+        self.samples = 0
+        self.blank = 0
+        self.blank_seconds = 0.0
+        self.gated = 0
+        self.ssim_calls = 0
+
+    def signature(self, frame):
+        """Grayscale frame downscaled to compare_width and cropped to the slide region"""
+        self.samples += 1
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = downscale_gray(gray_frame, self.compare_width)
+        if self.roi is None:
+            return small
+        x, y, w, h = scale_region(self.roi, self.frame_shape or gray_frame.shape, small.shape)
+        return small[y:y + h, x:x + w]
+
+    def score(self, last_signature, signature):
+        """Similarity score in the SSIM range; gated frames score 1.0"""
+        if self.detector == "tiered" and cv2.absdiff(last_signature, signature).mean() < self.pixel_diff_gate:
+            self.gated += 1
+            return 1.0
+        self.ssim_calls += 1
+        return ssim(last_signature, signature)
+
+    def is_new_scene(self, score):
+        return score < self.ssim_threshold
+
+    def is_blank(self, frame):
+        """True if blank filtering is enabled and the frame has no meaningful content"""
+        if not self.skip_blank:
+            return False
+        start_time = time.perf_counter()
+        blank = is_blank_frame(frame)
+        self.blank_seconds += time.perf_counter() - start_time
+        self.blank += blank
+        return blank
+
+    def stats(self):
+        stats = f"{self.ssim_calls} SSIM comparisons, {self.gated} rejected by pixel-difference gate"
+        if self.blank:
+            stats += f", {self.blank} blank frames skipped ({self.blank_seconds * 1000:.1f}ms classifying)"
+        return stats
+
+
+def _is_sampled(frame_index, skip_frames):
+    """Every skip_frames-th frame (1-based) is compared, matching the original loop"""
+    return (frame_index + 1) % skip_frames == 0
+
+
+def _iter_sampled_frames(cap, skip_frames, sampling_mode, pbar=None, start_frame=0, end_frame=None):
+    """
+    Yields (frame_index, frame) for every frame that will be compared
+
+    Args:
+        cap: Opened cv2.VideoCapture
+        skip_frames (int): Compare every Nth frame
+        sampling_mode (str): 'read' decodes every frame, 'grab' only advances the
+            decoder for skipped frames, 'seek' jumps straight to each sampled frame
+        pbar: Optional tqdm progress bar, advanced by the number of frames passed
+        start_frame (int): First frame index to consider
+        end_frame (int): Frame index to stop before, or None to read to the end
+
+    Yields:
+        tuple: (0-based frame index, BGR frame)
+    """
+    if sampling_mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {sampling_mode}. Expected one of {SAMPLING_MODES}")
+
+    if sampling_mode == "seek":
+        frame_index = start_frame + (skip_frames - 1 - start_frame) % skip_frames
+        while end_frame is None or frame_index < end_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if pbar is not None:
+                pbar.update(skip_frames)
+            yield frame_index, frame
+            frame_index += skip_frames
+        return
+
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frame_index = start_frame - 1
+    while cap.isOpened():
+        frame_index += 1
+        if end_frame is not None and frame_index >= end_frame:
+            break
+        if sampling_mode == "read":
+            ret, frame = cap.read()
+        else:
+            ret = cap.grab()
+        if not ret:
+            break
+
+        if pbar is not None:
+            pbar.update(1)
+
+        if not _is_sampled(frame_index, skip_frames):
+            continue
+
+        if sampling_mode == "grab":
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+        yield frame_index, frame
+
+
+_END_OF_STREAM = object()
+
+
+def _prefetch(samples, queue_size):
+    """
+    Runs a sample iterator on a decoder thread, handing frames over through a
+    bounded queue so decoding blocks once queue_size frames are waiting
+
+    Exceptions raised while decoding are re-raised in the consuming thread.
+    """
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        try:
+            for item in samples:
+                if not put(item):
+                    return
+            put(_END_OF_STREAM)
+        except Exception as e:
+            put(e)
+
+    decoder = threading.Thread(target=decode, name="frame-decoder", daemon=True)
+    decoder.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is _END_OF_STREAM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        decoder.join()
+
+
+class _SceneWriter:
+    """
+    Encodes scene images on a thread pool
+
+    At most max_pending images may be queued or encoding at once; further writes
+    block the caller, which keeps memory bounded when encoding falls behind.
+    """
+    def __init__(self, threads, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="scene-writer")
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+
+    def write(self, output_filename, frame):
+        self.pending.acquire()
+        future = self.executor.submit(cv2.imwrite, output_filename, frame)
+        future.add_done_callback(lambda _: self.pending.release())
+        self.futures.append((output_filename, future))
+
+    def close(self):
+        """Waits for every queued image and returns the number written"""
+        self.executor.shutdown(wait=True)
+        for output_filename, future in self.futures:
+            if not future.result():
+                raise IOError(f"Could not write scene image: {output_filename}")
+        return len(self.futures)
+
+
+def _report_throughput(sampling_mode, sampled_frames, frames_advanced, elapsed):
+    """Print decode throughput for a sampling run and return frames advanced per second"""
+    throughput = frames_advanced / elapsed if elapsed > 0 else 0.0
+    print(f"Sampling mode '{sampling_mode}': {sampled_frames} sampled / {frames_advanced} frames "
+          f"in {elapsed:.2f}s ({throughput:.1f} video frames/s)")
+    return throughput
+
+
+def _resolve_slide_region(video_path, slide_region):
+    """Turns the slide_region setting (None, 'auto' or (x, y, w, h)) into a region or None"""
+    if slide_region == "auto":
+        return detect_slide_region(video_path)
+    return tuple(slide_region) if slide_region is not None else None
+
+
+def _iter_ffmpeg_frames(video_path, skip_frames, fps, video_shape, decode_width, keyframes_only, pbar=None):
+    """
+    Yields (frame_index, gray_frame) from an FFmpegFrameSource scaled to decode_width
+
+    Frames have the size ChangeDetector and FrameSignatureIndex downscale to.
+    """
+    decode_height, decode_width = thumbnail_shape(video_shape, decode_width)
+    source = FFmpegFrameSource(video_path, decode_width, decode_height, fps, skip_frames, keyframes_only)
+
+    def frames():
+        last_frame_index = -1
+        for frame_index, gray_frame in source:
+            if pbar is not None:
+                pbar.update(frame_index - last_frame_index)
+            last_frame_index = frame_index
+            yield frame_index, gray_frame
+    return frames()
+
+
+def _scan_scenes(samples, change_detector, last_signature=None):
+    """
+    Runs the scene decision over sampled frames
+
+    Args:
+        samples: Iterable of (frame_index, frame) pairs
+        change_detector (ChangeDetector): Detector deciding scene changes
+        last_signature: Signature of the previously saved scene, if any
+
+    Yields:
+        tuple: (frame_index, frame, signature, score) for every frame that starts a
+            new scene; score is None for the first frame when there is no previous scene
+
+    Blank candidates are dropped without becoming the previous scene, so a slide
+    that returns after a black transition is not saved twice.
+    """
+    for frame_index, frame in samples:
+        signature = change_detector.signature(frame)
+        if last_signature is None:
+            if change_detector.is_blank(frame):
+                continue
+            last_signature = signature
+            yield frame_index, frame, signature, None
+            continue
+
+        score = change_detector.score(last_signature, signature)
+        if change_detector.is_new_scene(score) and not change_detector.is_blank(frame):
+            last_signature = signature
+            yield frame_index, frame, signature, score
+
+
+def _record_signatures(samples, index, video_path, skip_frames, frame_count, fps, video_shape, **metadata):
+    """
+    Passes samples through unchanged while adding their thumbnails to a FrameSignatureIndex
+
+    video_shape is the (height, width) of the video itself, which may be larger
+    than the frames a decode backend delivers. metadata holds the slide region
+    and settings keywords of FrameSignatureIndex.create.
+    """
+    for frame_index, frame in samples:
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if index.meta is None:
+            index.create(video_path, skip_frames, frame_count, fps, video_shape, **metadata)
+        index.add(frame_index, gray_frame)
+        yield frame_index, frame
+    if index.meta is not None:
+        index.close()
+
+
+def _scan_chunk(video_path, chunk_folder, start_frame, end_frame, skip_frames, ssim_threshold,
+                sampling_mode, detector, roi):
+    """
+    Process pool worker: scans one frame range as if it were a video of its own
+
+    Every scene found is written to chunk_folder as frame_<index>.png so the merge
+    step can keep or drop it without decoding again.
+
+    Returns:
+        tuple: (list of (frame_index, score) scenes, signature of the last scene)
+    """
+    os.makedirs(chunk_folder, exist_ok=True)
+    cap = cv2.VideoCapture(video_path)
+    change_detector = ChangeDetector(ssim_threshold, detector, roi=roi)
+    samples = _iter_sampled_frames(cap, skip_frames, sampling_mode, start_frame=start_frame, end_frame=end_frame)
+
+    scenes = []
+    last_signature = None
+    for frame_index, frame, signature, score in _scan_scenes(samples, change_detector):
+        cv2.imwrite(os.path.join(chunk_folder, f"frame_{frame_index}.png"), frame)
+        scenes.append((frame_index, score))
+        last_signature = signature
+    cap.release()
+    return scenes, last_signature
+
+
+def _extract_frames_parallel(video_path, output_folder, skip_frames, ssim_threshold, sampling_mode,
+                             detector, workers, frame_count, roi, scenes):
+    """
+    Splits the video into one frame range per worker, scans the ranges in separate
+    processes and merges them into the same scene_N.png sequence a sequential run
+    would produce.
+
+    A chunk scans its range starting from an empty scene history, so its first
+    scenes may differ from the sequential run. The merge replays each chunk from
+    the previous chunk's last scene until the replay saves a frame the chunk also
+    saved; from there both runs compare against the same frame and the rest of
+    the chunk's scenes are taken as they are.
+
+    (frame_index, score) of every saved scene is appended to scenes.
+    """
+    bounds = [round(k * frame_count / workers) for k in range(workers + 1)]
+    ranges = [(bounds[k], bounds[k + 1] if k < workers - 1 else None) for k in range(workers)]
+    chunk_folders = [os.path.join(output_folder, f".chunk_{k}") for k in range(workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_scan_chunk, video_path, chunk_folder, start_frame, end_frame,
+                            skip_frames, ssim_threshold, sampling_mode, detector, roi)
+            for chunk_folder, (start_frame, end_frame) in zip(chunk_folders, ranges)
+        ]
+        chunk_results = [future.result() for future in futures]
+
+    cap = cv2.VideoCapture(video_path)
+    change_detector = ChangeDetector(ssim_threshold, detector, roi=roi)
+    scene_number = 0
+    last_signature = None
+    for (start_frame, end_frame), chunk_folder, (chunk_scenes, chunk_last_signature) in zip(
+            ranges, chunk_folders, chunk_results):
+        chunk_scene_indices = [frame_index for frame_index, _ in chunk_scenes]
+        first_kept = 0
+
+        if last_signature is not None:
+            # Replay the start of the chunk against the scene saved before it
+            first_kept = len(chunk_scenes)
+            replay_last_signature = last_signature
+            samples = _iter_sampled_frames(cap, skip_frames, sampling_mode, start_frame=start_frame, end_frame=end_frame)
+            for frame_index, frame, signature, score in _scan_scenes(samples, change_detector, last_signature):
+                if frame_index in chunk_scene_indices:
+                    first_kept = chunk_scene_indices.index(frame_index)
+                    # The chunk scanned this frame with no earlier scene; the replay scored it
+                    chunk_scenes[first_kept] = (frame_index, score)
+                    break
+                scene_number += 1
+                output_filename = f'{output_folder}/scene_{scene_number}.png'
+                cv2.imwrite(output_filename, frame)
+                scenes.append((frame_index, score))
+                replay_last_signature = signature
+                print(f"New scene detected: {output_filename}, SSIM={score:.2f}")
+            last_signature = replay_last_signature
+
+        for frame_index, score in chunk_scenes[first_kept:]:
+            scene_number += 1
+            output_filename = f'{output_folder}/scene_{scene_number}.png'
+            os.replace(os.path.join(chunk_folder, f"frame_{frame_index}.png"), output_filename)
+            scenes.append((frame_index, score))
+            if score is None:
+                print(f"First scene saved: {output_filename}")
+            else:
+                print(f"New scene detected: {output_filename}, SSIM={score:.2f}")
+        if first_kept < len(chunk_scenes):
+            last_signature = chunk_last_signature
+
+        shutil.rmtree(chunk_folder, ignore_errors=True)
+    cap.release()
+    return scene_number
+
+
+def _write_scene_manifest(output_folder, scenes, fps):
+    """
+    Records when each saved scene occurs
+
+    Args:
+        output_folder (str): Folder holding the scene images
+        scenes (list): (frame_index, ssim_score) of scene_1, scene_2, ... in order
+        fps (float): Frame rate used to turn frame indices into seconds
+    """
+    manifest = {
+        "fps": fps,
+        "scenes": [
+            {
+                "scene": scene_number,
+                "frame_index": int(frame_index),
+                "time": frame_index / fps if fps else 0.0,
+                "ssim": None if score is None else float(score)
+            }
+            for scene_number, (frame_index, score) in enumerate(scenes, start=1)
+        ]
+    }
+    with open(os.path.join(output_folder, SCENE_MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _frame_cache_key(video_path, skip_frames, ssim_threshold, detector, slide_region, source, sampling_mode=None,
+                     compare_width=COMPARE_WIDTH):
+    """
+    Artifact cache key of a scene set
+
+    source names how frames were compared (decode backend or 'index'); sampling_mode
+    is None for scenes computed from the signature index.
+    """
+    return artifact_key("frames", video_content_hash(video_path), skip_frames=skip_frames,
+                        ssim_threshold=ssim_threshold, detector=detector, slide_region=slide_region,
+                        slide_region_detection=detection_settings() if slide_region == "auto" else None,
+                        source=source, sampling_mode=sampling_mode, compare_width=compare_width,
+                        pixel_diff_gate_scale=PIXEL_DIFF_GATE_SCALE,
+                        skip_blank=classifier_settings() if SKIP_BLANK_FRAMES else False)
+
+
+def _fetch_cached_frames(cache_key, output_folder):
+    """Replaces the scene images in output_folder with a cached scene set; returns the scene count or None"""
+    os.makedirs(output_folder, exist_ok=True)
+    cache = ArtifactCache()
+    if not cache.contains("frames", cache_key):
+        return None
+    _remove_scene_images(output_folder)
+    files = cache.fetch("frames", cache_key, output_folder)
+    return None if files is None else sum(filename.endswith(".png") for filename in files)
+
+
+def _store_frames(cache_key, output_folder, scene_count, video_path):
+    files = [f"scene_{scene_number}.png" for scene_number in range(1, scene_count + 1)] + [SCENE_MANIFEST_FILE]
+    ArtifactCache().store("frames", cache_key, output_folder, files, video=os.path.basename(video_path))
+
+
+def extract_frames(video_path, output_folder, skip_frames, ssim_threshold, sampling_mode=FRAME_SAMPLING_MODE,
+                   detector=CHANGE_DETECTOR, workers=EXTRACTION_WORKERS, pipelined=PIPELINED_EXTRACTION,
+                   build_index=BUILD_SIGNATURE_INDEX, slide_region=SLIDE_REGION, backend=DECODE_BACKEND,
+                   keyframes_only=KEYFRAMES_ONLY, use_cache=USE_ARTIFACT_CACHE):
+    """
+    Saves the first frame of every scene as scene_N.png in output_folder
+
+    Scene sets are kept in the artifact cache keyed by the video's content hash
+    and every parameter that changes which frames are chosen, so extracting the
+    same video again with the same settings only copies the cached images.
+
+    Returns:
+        int: Number of scenes
+    """
+    if use_cache:
+        cache_key = _frame_cache_key(video_path, skip_frames, ssim_threshold, detector, slide_region,
+                                     "ffmpeg/keyframes" if backend == "ffmpeg" and keyframes_only else backend,
+                                     sampling_mode)
+        scene_count = _fetch_cached_frames(cache_key, output_folder)
+        if scene_count is not None:
+            print(f'Total unique scenes detected: {scene_count} (cached)')
+            return scene_count
+
+    scene_count = _extract_frames(video_path, output_folder, skip_frames, ssim_threshold, sampling_mode, detector,
+                                  workers, pipelined, build_index, slide_region, backend, keyframes_only)
+    if use_cache and scene_count is not None:
+        _store_frames(cache_key, output_folder, scene_count, video_path)
+    return scene_count
+
+
+def _extract_frames(video_path, output_folder, skip_frames, ssim_threshold, sampling_mode, detector, workers,
+                    pipelined, build_index, slide_region, backend, keyframes_only):
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
+    if backend not in DECODE_BACKENDS:
+        raise ValueError(f"Unknown decode backend: {backend}. Expected one of {DECODE_BACKENDS}")
 
     cap = cv2.VideoCapture(video_path)
     fps = cap.get(cv2.CAP_PROP_FPS)
     frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    last_saved_frame = None
+    video_shape = (int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
     scene_number = 0
-    processed_frames = 0
 
     if not cap.isOpened():
         print("Error: Could not open video.")
         return
 
-    with tqdm(total=frame_count, desc='Processing video frames') as pbar:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            processed_frames += 1
-            pbar.update(1)
+    roi = _resolve_slide_region(video_path, slide_region)
+    change_detector = ChangeDetector(ssim_threshold, detector, roi=roi)
+    scenes = []
 
-            if processed_frames % skip_frames != 0:
-                continue
+    start_time = time.perf_counter()
+    if workers > 1 and frame_count >= workers * skip_frames:
+        cap.release()
+        scene_number = _extract_frames_parallel(video_path, output_folder, skip_frames, ssim_threshold,
+                                                sampling_mode, detector, workers, frame_count, roi, scenes)
+        _write_scene_manifest(output_folder, scenes, fps)
+        elapsed = time.perf_counter() - start_time
+        print(f"Scanned {frame_count} frames with {workers} workers in {elapsed:.2f}s "
+              f"({frame_count / elapsed:.1f} video frames/s)")
+        print(f'Total unique scenes detected: {scene_number}')
+        return scene_number
 
-            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            if last_saved_frame is not None:
-                ssim_score, _ = ssim(last_saved_frame, gray_frame, full=True)
+    with tqdm(total=frame_count, desc='Processing video frames') as pbar:
+        if backend == "ffmpeg":
+            # Frames arrive downscaled and gray; full frames are decoded only for saved scenes
+            samples = _iter_ffmpeg_frames(video_path, skip_frames, fps, video_shape, COMPARE_WIDTH,
+                                          keyframes_only, pbar)
+            change_detector.frame_shape = video_shape
+            sampling_mode = "ffmpeg/keyframes" if keyframes_only else "ffmpeg"
+        else:
+            samples = _iter_sampled_frames(cap, skip_frames, sampling_mode, pbar)
+        writer = None
+        if pipelined:
+            # Decode, compare and PNG encoding run as overlapping stages
+            samples = _prefetch(samples, PIPELINE_QUEUE_SIZE)
+            writer = _SceneWriter(WRITER_THREADS, PIPELINE_QUEUE_SIZE)
+        if build_index and not (backend == "ffmpeg" and keyframes_only):
+            # Keyframes fall at irregular positions, which no skip rate in the index could reproduce
+            samples = _record_signatures(
+                samples, FrameSignatureIndex(output_folder), video_path, skip_frames, frame_count, fps, video_shape,
+                detected_slide_region=roi,
+                slide_region_detection=detection_settings() if slide_region == "auto" else None,
+                settings=_scene_settings(skip_frames, ssim_threshold, detector, slide_region)
+            )
 
-                if ssim_score < ssim_threshold:
-                    scene_number += 1
-                    output_filename = f'{output_folder}/scene_{scene_number}.png'
-                    cv2.imwrite(output_filename, frame)
-                    last_saved_frame = gray_frame
-                    print(f"New scene detected: {output_filename}, SSIM={ssim_score:.2f}")
+        for frame_index, frame, gray_frame, ssim_score in _scan_scenes(samples, change_detector):
+            if backend == "ffmpeg":
+                frame = _read_frame(cap, frame_index)
+                if frame is None:
+                    raise IOError(f"Could not decode frame {frame_index} of {video_path}")
+            scene_number += 1
+            scenes.append((frame_index, ssim_score))
+            output_filename = f'{output_folder}/scene_{scene_number}.png'
+            if writer is not None:
+                writer.write(output_filename, frame)
             else:
-                # Save the first frame
-                scene_number += 1
-                output_filename = f'{output_folder}/scene_{scene_number}.png'
                 cv2.imwrite(output_filename, frame)
-                last_saved_frame = gray_frame
+            if ssim_score is None:
                 print(f"First scene saved: {output_filename}")
+            else:
+                print(f"New scene detected: {output_filename}, SSIM={ssim_score:.2f}")
+        if writer is not None:
+            scene_number = writer.close()
+        frames_advanced = pbar.n
 
     cap.release()
     cv2.destroyAllWindows()
+    _write_scene_manifest(output_folder, scenes, fps)
 
+    _report_throughput(sampling_mode, change_detector.samples, frames_advanced, time.perf_counter() - start_time)
+    print(f"Change detector '{detector}': {change_detector.stats()}")
     print(f'Total unique scenes detected: {scene_number}')
-    return scene_number 
\ No newline at end of file
+    return scene_number
+
+
+def _scene_settings(skip_frames, ssim_threshold, detector, slide_region):
+    """The settings that decide scenes, in the form stored with a signature index"""
+    return {"skip_frames": skip_frames, "ssim_threshold": ssim_threshold, "detector": detector,
+            "slide_region": list(slide_region) if isinstance(slide_region, tuple) else slide_region,
+            "skip_blank": SKIP_BLANK_FRAMES}
+
+
+def _remove_scene_images(output_folder):
+    for filename in os.listdir(output_folder):
+        if filename.startswith("scene_") and filename.endswith(".png"):
+            os.remove(os.path.join(output_folder, filename))
+
+
+def rethreshold_frames(video_path, output_folder, skip_frames, ssim_threshold, detector=CHANGE_DETECTOR,
+                       slide_region=SLIDE_REGION, use_cache=USE_ARTIFACT_CACHE):
+    """
+    Recomputes scenes from the signature index written by a previous extract_frames run
+
+    Scene boundaries are decided on the stored thumbnails, which are the frames
+    extract_frames compares, and only the chosen frames are decoded at full
+    resolution. Existing scene images are replaced. With the settings of the
+    pass that wrote the index there is nothing to recompute, and None is
+    returned so extract_frames can restore that pass's scenes.
+
+    Args:
+        video_path (str): Path to the video file
+        output_folder (str): Folder holding the index and the scene images
+        skip_frames (int): Compare every Nth frame; must be a multiple of the indexed rate
+        ssim_threshold (float): Scene threshold
+        detector (str): Change detector applied to the thumbnails
+        slide_region: None, 'auto' or an (x, y, w, h) pixel region to compare
+        use_cache (bool): Reuse and store scene sets in the artifact cache
+
+    Returns:
+        int: Number of scenes, or None if no usable index exists or the settings are unchanged
+    """
+    index = FrameSignatureIndex(output_folder)
+    if not index.load(video_path, skip_frames):
+        return None
+    if index.meta.get("settings") == _scene_settings(skip_frames, ssim_threshold, detector, slide_region):
+        print("Settings match the pass that built the signature index; keeping its scenes")
+        return None
+
+    if use_cache:
+        cache_key = _frame_cache_key(video_path, skip_frames, ssim_threshold, detector, slide_region, "index",
+                                     compare_width=index.meta["width"])
+        scene_count = _fetch_cached_frames(cache_key, output_folder)
+        if scene_count is not None:
+            print(f'Total unique scenes detected: {scene_count} (cached)')
+            return scene_count
+
+    found, region = index.detected_slide_region(detection_settings()) if slide_region == "auto" else (False, None)
+    if not found:
+        region = _resolve_slide_region(video_path, slide_region)
+    start_time = time.perf_counter()
+    change_detector = ChangeDetector(ssim_threshold, detector, compare_width=index.meta["width"], roi=region,
+                                     frame_shape=(index.meta["frame_height"], index.meta["frame_width"]))
+    scenes = [(frame_index, score) for frame_index, _, _, score
+              in _scan_scenes(index.samples(skip_frames), change_detector)]
+    print(f"Recomputed {len(scenes)} scenes from {change_detector.samples} indexed frames "
+          f"in {(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+    _remove_scene_images(output_folder)
+    cap = cv2.VideoCapture(video_path)
+    for scene_number, (frame_index, score) in enumerate(scenes, start=1):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        ret, frame = cap.read()
+        if not ret:
+            raise IOError(f"Could not decode frame {frame_index} of {video_path}")
+        output_filename = f'{output_folder}/scene_{scene_number}.png'
+        cv2.imwrite(output_filename, frame)
+        if score is None:
+            print(f"First scene saved: {output_filename}")
+        else:
+            print(f"New scene detected: {output_filename}, SSIM={score:.2f}")
+    cap.release()
+    _write_scene_manifest(output_folder, scenes, index.meta["fps"])
+
+    if use_cache:
+        _store_frames(cache_key, output_folder, len(scenes), video_path)
+    print(f'Total unique scenes detected: {len(scenes)}')
+    return len(scenes)
+
+
+def _read_frame(cap, frame_index):
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    ret, frame = cap.read()
+    return frame if ret else None
+
+
+def _coarse_samples(cap, seek_cap, stride, sampling_mode, pbar, frame_count):
+    """
+    Coarse samples from frame 0 through the final frame
+
+    The regular samples fall at the end of each full stride, so frame 0 and
+    the final frame are added to make transitions near either end searchable.
+    """
+    first_frame = _read_frame(seek_cap, 0)
+    if first_frame is not None:
+        yield 0, first_frame
+    last_index = 0
+    for frame_index, frame in _iter_sampled_frames(cap, stride, sampling_mode, pbar):
+        if frame_index > last_index:
+            last_index = frame_index
+            yield frame_index, frame
+    if frame_count - 1 > last_index:
+        final_frame = _read_frame(seek_cap, frame_count - 1)
+        if final_frame is not None:
+            yield frame_count - 1, final_frame
+
+
+def extract_frames_adaptive(video_path, output_folder, ssim_threshold, stride_seconds=ADAPTIVE_STRIDE_SECONDS,
+                            settle_frames=ADAPTIVE_SETTLE_FRAMES, sampling_mode="seek",
+                            detector=CHANGE_DETECTOR, slide_region=SLIDE_REGION):
+    """
+    Coarse-to-fine scene extraction
+
+    Samples frame 0, one frame every stride_seconds and the final frame. When a
+    video opens on blank frames, the first frame with content is binary searched
+    the same way. When a sample differs from the last
+    saved scene, the interval since the previous sample is binary searched for the
+    first frame that differs, and the scene image is taken settle_frames after
+    that transition (capped at the coarse sample) so fades and build animations
+    have finished. Several slides shown within one stride are found one after
+    another by repeating the search from the newly saved frame.
+
+    Args:
+        video_path (str): Path to the video file
+        output_folder (str): Folder the scene images are written to
+        ssim_threshold (float): Scene threshold
+        stride_seconds (float): Distance between coarse samples
+        settle_frames (int): Frames to wait after a transition before capturing it
+        sampling_mode (str): Sampling mode for the coarse pass; seeking suits long strides
+        detector (str): Change detector
+        slide_region: None, 'auto' or an (x, y, w, h) pixel region to compare
+
+    Returns:
+        int: Number of scenes saved
+    """
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print("Error: Could not open video.")
+        return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    stride = max(1, round(stride_seconds * fps))
+    seek_cap = cv2.VideoCapture(video_path)
+    change_detector = ChangeDetector(ssim_threshold, detector, roi=_resolve_slide_region(video_path, slide_region))
+
+    scene_number = 0
+    searched_frames = 0
+    last_signature = None
+    last_position = -1
+    blank_position = None
+    scenes = []
+
+    def save(frame, frame_index, score):
+        nonlocal scene_number
+        scene_number += 1
+        scenes.append((frame_index, score))
+        output_filename = f'{output_folder}/scene_{scene_number}.png'
+        cv2.imwrite(output_filename, frame)
+        if score is None:
+            print(f"First scene saved: {output_filename}")
+        else:
+            print(f"New scene detected: {output_filename} at frame {frame_index}, SSIM={score:.2f}")
+
+    start_time = time.perf_counter()
+    with tqdm(total=frame_count, desc='Processing video frames') as pbar:
+        for frame_index, frame in _coarse_samples(cap, seek_cap, stride, sampling_mode, pbar, frame_count):
+            signature = change_detector.signature(frame)
+            if last_signature is None:
+                if change_detector.is_blank(frame):
+                    blank_position = frame_index
+                    continue
+                capture_position, capture_frame = frame_index, frame
+                if blank_position is not None:
+                    # Invariant: lo is blank, hi has content
+                    lo, hi = blank_position, frame_index
+                    while hi - lo > 1:
+                        mid = (lo + hi) // 2
+                        mid_frame = _read_frame(seek_cap, mid)
+                        searched_frames += 1
+                        if mid_frame is None or not change_detector.is_blank(mid_frame):
+                            hi = mid
+                        else:
+                            lo = mid
+                    capture_position = min(hi + settle_frames, frame_index)
+                    capture_frame = _read_frame(seek_cap, capture_position) if capture_position < frame_index else frame
+                    if capture_frame is None or change_detector.is_blank(capture_frame):
+                        capture_position, capture_frame = frame_index, frame
+                save(capture_frame, capture_position, None)
+                last_signature, last_position = change_detector.signature(capture_frame), capture_position
+                if capture_position == frame_index:
+                    continue
+
+            score = change_detector.score(last_signature, signature)
+            while change_detector.is_new_scene(score):
+                # Invariant: lo matches the last scene, hi does not
+                lo, hi = last_position, frame_index
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    mid_frame = _read_frame(seek_cap, mid)
+                    searched_frames += 1
+                    if mid_frame is None or change_detector.is_new_scene(
+                            change_detector.score(last_signature, change_detector.signature(mid_frame))):
+                        hi = mid
+                    else:
+                        lo = mid
+
+                capture_position = min(hi + settle_frames, frame_index)
+                capture_frame = frame if capture_position == frame_index else _read_frame(seek_cap, capture_position)
+                if capture_frame is None:
+                    capture_position, capture_frame = frame_index, frame
+                if change_detector.is_blank(capture_frame):
+                    # A transition into a blank frame; take the coarse sample instead if it has content
+                    if capture_position == frame_index or change_detector.is_blank(frame):
+                        break
+                    capture_position, capture_frame = frame_index, frame
+                capture_signature = change_detector.signature(capture_frame)
+                save(capture_frame, hi, change_detector.score(last_signature, capture_signature))
+                last_signature, last_position = capture_signature, capture_position
+
+                if capture_position == frame_index:
+                    break
+                score = change_detector.score(last_signature, signature)
+        frames_advanced = pbar.n
+
+    cap.release()
+    seek_cap.release()
+    _write_scene_manifest(output_folder, scenes, fps)
+
+    _report_throughput(f"adaptive/{sampling_mode}", change_detector.samples, frames_advanced,
+                       time.perf_counter() - start_time)
+    print(f"Coarse stride {stride} frames, {searched_frames} frames decoded by transition search")
+    print(f"Change detector '{detector}': {change_detector.stats()}")
+    print(f'Total unique scenes detected: {scene_number}')
+    return scene_number
+
+
+def benchmark_adaptive(video_path, skip_frames, ssim_threshold, stride_seconds=ADAPTIVE_STRIDE_SECONDS):
+    """
+    Times extract_frames at skip_frames against extract_frames_adaptive on the same video
+
+    Scene images are written to temporary folders that are removed afterwards.
+
+    Returns:
+        dict: 'fixed' and 'adaptive' -> (seconds, scene count)
+    """
+    results = {}
+    runs = {
+        "fixed": lambda folder: extract_frames(video_path, folder, skip_frames, ssim_threshold,
+                                               build_index=False, use_cache=False),
+        "adaptive": lambda folder: extract_frames_adaptive(video_path, folder, ssim_threshold,
+                                                           stride_seconds=stride_seconds),
+    }
+    for name, run in runs.items():
+        folder = tempfile.mkdtemp(prefix=f"{name}_scenes_")
+        try:
+            start_time = time.perf_counter()
+            scenes = run(folder)
+            results[name] = (time.perf_counter() - start_time, scenes)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    for name, (elapsed, scenes) in results.items():
+        print(f"{name}: {scenes} scenes in {elapsed:.2f}s")
+    return results
+
+
+def benchmark_sampling_modes(video_path, skip_frames, max_frames=None, modes=SAMPLING_MODES):
+    """
+    Measures decode throughput of each sampling mode without comparing or saving frames
+
+    Args:
+        video_path (str): Path to the video file
+        skip_frames (int): Compare every Nth frame
+        max_frames (int): Optional limit on the number of video frames to advance through
+        modes (tuple): Sampling modes to measure
+
+    Returns:
+        dict: Sampling mode -> video frames advanced per second
+    """
+    results = {}
+    for mode in modes:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+
+        sampled_frames = 0
+        frame_index = -1
+        start_time = time.perf_counter()
+        for frame_index, _ in _iter_sampled_frames(cap, skip_frames, mode):
+            sampled_frames += 1
+            if max_frames is not None and frame_index + 1 >= max_frames:
+                break
+        elapsed = time.perf_counter() - start_time
+        cap.release()
+
+        results[mode] = _report_throughput(mode, sampled_frames, frame_index + 1, elapsed)
+    return results
+
+
+def compare_detectors(video_path, skip_frames, ssim_threshold, detector="tiered",
+                      sampling_mode=FRAME_SAMPLING_MODE, max_frames=None):
+    """
+    Checks a change detector's scene decisions against the 'ssim' baseline
+
+    Both detectors are evaluated on every sampled frame against the scene the
+    baseline would have saved last, so each disagreement is a frame where the
+    candidate detector would have decided differently.
+
+    Args:
+        video_path (str): Path to the video file
+        skip_frames (int): Compare every Nth frame
+        ssim_threshold (float): Scene threshold used by both detectors
+        detector (str): Detector to check against 'ssim'
+        sampling_mode (str): Sampling mode used to read frames
+        max_frames (int): Optional limit on the number of video frames to read
+
+    Returns:
+        dict: Decision counts, disagreeing frame indices and time spent in each detector
+    """
+    baseline = ChangeDetector(ssim_threshold, "ssim")
+    candidate = ChangeDetector(ssim_threshold, detector)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    baseline_last = candidate_last = None
+    baseline_time = candidate_time = 0.0
+    report = {"sampled": 0, "baseline_scenes": 0, "candidate_scenes": 0, "disagreements": []}
+    for frame_index, frame in _iter_sampled_frames(cap, skip_frames, sampling_mode):
+        if max_frames is not None and frame_index >= max_frames:
+            break
+        report["sampled"] += 1
+
+        start_time = time.perf_counter()
+        baseline_signature = baseline.signature(frame)
+        baseline_new = baseline_last is None or baseline.is_new_scene(baseline.score(baseline_last, baseline_signature))
+        baseline_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        candidate_signature = candidate.signature(frame)
+        candidate_new = candidate_last is None or candidate.is_new_scene(candidate.score(candidate_last, candidate_signature))
+        candidate_time += time.perf_counter() - start_time
+
+        report["baseline_scenes"] += int(baseline_new)
+        report["candidate_scenes"] += int(candidate_new)
+        if baseline_new != candidate_new:
+            report["disagreements"].append(frame_index)
+        if baseline_new:
+            baseline_last = baseline_signature
+            candidate_last = candidate_signature
+    cap.release()
+
+    report["baseline_seconds"] = baseline_time
+    report["candidate_seconds"] = candidate_time
+    print(f"'{detector}' vs 'ssim': {len(report['disagreements'])} of {report['sampled']} decisions differ, "
+          f"comparison time {candidate_time:.2f}s vs {baseline_time:.2f}s")
+    return report
@@ -1,27 +1,382 @@
 import whisper
 import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from AudioCache import load_audio
+from ArtifactCache import ArtifactCache, artifact_key
+from Utils import video_content_hash
+from TranscriptJournal import TranscriptJournal
+from constants import (
+    WHISPER_MODEL,
+    WHISPER_CACHE_MAX_BYTES,
+    TRANSCRIBE_WORKERS,
+    VAD_FRAME_SECONDS,
+    VAD_MIN_SILENCE_SECONDS,
+    VAD_ENERGY_RATIO,
+    CHUNK_TARGET_SECONDS,
+    CHUNK_MAX_SECONDS,
+    TRANSCRIPT_JOURNAL_FILE,
+    USE_ARTIFACT_CACHE
+)
 
-def transcribe_video(video_path, output_folder):
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+
+class TranscriptionCancelled(Exception):
+    """Raised by a background transcription stopped because one with another model was started"""
+
+# Background transcriptions keyed by (video path, output folder), then by model name, as
+# (future, cancel event). A single thread runs them one at a time so two jobs never share
+# an output folder's journal.
+_background_jobs = {}
+_background_lock = threading.Lock()
+_background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcription")
+
+# Loaded models keyed by (model name, device), least recently used first
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+def _resolve_device(device):
+    if device is not None:
+        return device
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _model_size(model):
+    """Memory held by a model's parameters and buffers, in bytes"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def get_model(model_name=WHISPER_MODEL, device=None):
+    """
+    Returns a loaded Whisper model, loading it only on first use
+
+    Models stay in memory for the life of the process. When the cached models
+    exceed WHISPER_CACHE_MAX_BYTES the least recently used ones are dropped; the
+    model just requested is always kept.
+
+    Args:
+        model_name (str): Whisper model size, e.g. 'base' or 'small'
+        device (str): Torch device; defaults to CUDA when available
+
+    Returns:
+        whisper.Whisper: The loaded model
+    """
+    key = (model_name, _resolve_device(device))
+    with _model_cache_lock:
+        if key in _model_cache:
+            _model_cache.move_to_end(key)
+            return _model_cache[key][0]
+
+        model = whisper.load_model(model_name, device=key[1])
+        _model_cache[key] = (model, _model_size(model))
+
+        while len(_model_cache) > 1 and sum(size for _, size in _model_cache.values()) > WHISPER_CACHE_MAX_BYTES:
+            evicted, _ = _model_cache.popitem(last=False)
+            print(f"Evicted Whisper model {evicted[0]} ({evicted[1]}) from cache")
+        return model
+
+
+def warm_model(model_name=WHISPER_MODEL, device=None, background=True):
+    """
+    Loads a model into the cache ahead of the first transcription
+
+    Args:
+        model_name (str): Whisper model size
+        device (str): Torch device; defaults to CUDA when available
+        background (bool): Load on a daemon thread and return immediately
+
+    Returns:
+        threading.Thread or None: The loading thread when background is set
+    """
+    if not background:
+        get_model(model_name, device)
+        return None
+    thread = threading.Thread(target=get_model, args=(model_name, device), name="whisper-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def clear_model_cache():
+    """Drops every cached model"""
+    with _model_cache_lock:
+        _model_cache.clear()
+
+
+def find_silences(audio, sample_rate=SAMPLE_RATE, frame_seconds=VAD_FRAME_SECONDS,
+                  min_silence_seconds=VAD_MIN_SILENCE_SECONDS, energy_ratio=VAD_ENERGY_RATIO):
+    """
+    Energy-based voice activity detection
+
+    Audio is cut into frame_seconds windows; a window is silent when its RMS is
+    below energy_ratio times the median RMS of the louder half of the windows.
+
+    Returns:
+        list: (start_sample, end_sample) of every silence lasting at least min_silence_seconds
+    """
+    frame = max(1, int(frame_seconds * sample_rate))
+    frame_count = len(audio) // frame
+    if frame_count == 0:
+        return []
+    rms = np.sqrt(np.mean(np.square(audio[:frame_count * frame].reshape(frame_count, frame)), axis=1))
+    loud = np.sort(rms)[frame_count // 2:]
+    silent = rms < energy_ratio * np.median(loud)
+
+    # Run-length encode the silent windows
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    min_frames = max(1, int(min_silence_seconds / frame_seconds))
+    return [(int(start) * frame, int(end) * frame) for start, end in zip(edges[::2], edges[1::2])
+            if end - start >= min_frames]
+
+
+def split_on_silence(audio, sample_rate=SAMPLE_RATE, target_seconds=CHUNK_TARGET_SECONDS,
+                     max_seconds=CHUNK_MAX_SECONDS):
+    """
+    Splits audio into chunks of about target_seconds, cutting in the middle of silences
+
+    A chunk is cut at the first silence after target_seconds; if none comes
+    before max_seconds it is cut there regardless.
+
+    Returns:
+        list: (start_sample, end_sample) chunk boundaries covering the whole audio
+    """
+    cut_points = [(start + end) // 2 for start, end in find_silences(audio, sample_rate)]
+    target, limit = int(target_seconds * sample_rate), int(max_seconds * sample_rate)
+
+    chunks = []
+    start = 0
+    while len(audio) - start > limit:
+        candidates = [cut for cut in cut_points if start + target <= cut <= start + limit]
+        end = candidates[0] if candidates else start + limit
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, len(audio)))
+    return chunks
+
+
+_worker_model = None
+
+
+def _init_transcription_worker(model_name, threads):
+    """Process pool initializer: each worker loads its own model once"""
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads)
+    _worker_model = whisper.load_model(model_name, device="cpu")
+
+
+def _transcribe_chunk(audio_chunk, offset_seconds):
     """
-    Transcribes video if transcript doesn't exist
+    Process pool worker: transcribes one chunk and shifts its timestamps
+
+    audio_chunk is either the samples themselves or (path, start, end) of a
+    cached audio file, which the worker maps instead of receiving a copy.
+    """
+    if isinstance(audio_chunk, tuple):
+        path, start, end = audio_chunk
+        audio_chunk = np.memmap(path, dtype=np.float32, mode="c", offset=start * 4, shape=(end - start,))
+    result = _worker_model.transcribe(audio_chunk)
+    return _shift_segments(result, offset_seconds)
+
+
+def _shift_segments(result, offset_seconds):
+    """Keeps the id, timestamps and text of each segment, moved by offset_seconds"""
+    segments = [
+        {
+            "id": segment["id"],
+            "start": float(segment["start"]) + offset_seconds,
+            "end": float(segment["end"]) + offset_seconds,
+            "text": segment["text"]
+        }
+        for segment in result["segments"]
+    ]
+    return {"text": result["text"], "segments": segments, "language": result.get("language")}
+
+
+def _transcribe_chunks(audio, chunks, model_name, workers):
+    """
+    Transcribes chunks of 16 kHz audio, yielding each chunk's result in order
+
+    With one worker the cached model runs in this process and each chunk is
+    prompted with the end of the previous chunk's text to keep wording
+    consistent. Otherwise the chunks run on a process pool with one model per
+    worker and torch limited to an even share of the CPU cores.
+
+    Yields:
+        tuple: (result with timestamps relative to the start of the audio, end of the chunk in seconds)
+    """
+    if workers <= 1:
+        model = get_model(model_name)
+        prompt = None
+        for start, end in chunks:
+            result = model.transcribe(audio[start:end], initial_prompt=prompt)
+            prompt = result["text"][-200:] or None
+            yield _shift_segments(result, start / SAMPLE_RATE), end / SAMPLE_RATE
+        return
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_transcription_worker,
+                                   initargs=(model_name, threads))
+    try:
+        futures = [
+            executor.submit(
+                _transcribe_chunk,
+                (audio.filename, start, end) if isinstance(audio, np.memmap) else audio[start:end],
+                start / SAMPLE_RATE
+            )
+            for start, end in chunks
+        ]
+        for future, (_, end) in zip(futures, chunks):
+            yield future.result(), end / SAMPLE_RATE
+    finally:
+        # Chunks not started yet are dropped when the caller stops early
+        executor.shutdown(cancel_futures=True)
+
+
+def _transcription_settings(workers):
+    """
+    Settings besides the audio and model that change the transcript text
+
+    Chunk boundaries come from the chunk lengths and the VAD settings. With one
+    worker each chunk is prompted with the previous chunk's text, which worker
+    processes can't do, so only whether there is more than one worker matters.
+    """
+    return {
+        "chunking": [CHUNK_TARGET_SECONDS, CHUNK_MAX_SECONDS],
+        "vad": [VAD_FRAME_SECONDS, VAD_MIN_SILENCE_SECONDS, VAD_ENERGY_RATIO],
+        "prompted": workers <= 1
+    }
+
+
+def stream_transcript(video_path, output_folder, model_name=WHISPER_MODEL, workers=TRANSCRIBE_WORKERS,
+                      cancel=None):
+    """
+    Yields transcript segments as they are transcribed, resuming an interrupted run
+
+    Segments are journaled to <output_folder>/transcript.jsonl one chunk at a
+    time. When a journal for the same audio, model and settings exists, its
+    completed segments are yielded first and transcription continues from the
+    last checkpoint instead of starting over.
+
+    Args:
+        video_path (str): Path to the video file
+        output_folder (str): Folder holding the audio cache and the journal
+        model_name (str): Whisper model size
+        workers (int): Number of worker processes
+        cancel (threading.Event): When set, raises TranscriptionCancelled once the current chunk is journaled
+
+    Yields:
+        dict: Segments with 'id', 'start', 'end' (seconds) and 'text'
+    """
+    audio = load_audio(video_path, output_folder)
+    header = {
+        "audio": video_content_hash(video_path),
+        "model": model_name,
+        **_transcription_settings(workers)
+    }
+    journal = TranscriptJournal(output_folder).open(header)
+    try:
+        yield from list(journal.segments)
+        if journal.complete:
+            return
+
+        chunks = [(start, end) for start, end in split_on_silence(audio) if end / SAMPLE_RATE > journal.offset]
+        if journal.offset:
+            print(f"Resuming transcription at {journal.offset:.1f}s, {len(chunks)} chunks left")
+        for result, end_seconds in _transcribe_chunks(audio, chunks, model_name, workers):
+            segments = result["segments"]
+            for number, segment in enumerate(segments, start=len(journal.segments)):
+                segment["id"] = number
+            journal.append_chunk(segments, end_seconds)
+            yield from segments
+            # Checked only once the chunk is journaled so a later run resumes after it
+            if cancel is not None and cancel.is_set():
+                raise TranscriptionCancelled(f"Transcription with '{model_name}' was superseded")
+        journal.mark_complete()
+    finally:
+        journal.close()
+
+
+def transcribe_video(video_path, output_folder, model_name=WHISPER_MODEL, workers=TRANSCRIBE_WORKERS,
+                     use_cache=USE_ARTIFACT_CACHE, cancel=None):
+    """
+    Transcribes video unless the same video was already transcribed with the same model
+
+    Transcripts are looked up in the artifact cache by the video's content hash,
+    the model name and the chunking settings, so a renamed upload reuses its
+    transcript and a different video under a reused name is transcribed afresh.
+    Otherwise the audio track is decoded once into the shared audio cache and
+    transcribed in silence-aligned chunks (in parallel processes when workers > 1).
+    Progress is journaled, so an interrupted transcription resumes where it stopped.
     """
     transcript_path = os.path.join(output_folder, "transcript.txt")
-    
-    # If transcript already exists, return its path
-    if os.path.exists(transcript_path):
+    cache = ArtifactCache()
+    cache_key = artifact_key("transcript", video_content_hash(video_path), model=model_name,
+                             **_transcription_settings(workers))
+
+    # If this video was already transcribed with this model, reuse the transcript
+    if use_cache and cache.fetch("transcript", cache_key, output_folder) is not None:
         return transcript_path
-        
-    # Generate transcript if it doesn't exist
+
+    # Generate transcript if it isn't cached
     try:
-        # Your existing transcription code here
-        model = whisper.load_model("base")
-        result = model.transcribe(video_path)
-        
+        segments = list(stream_transcript(video_path, output_folder, model_name, workers, cancel))
+
         # Save transcript
         with open(transcript_path, "w", encoding="utf-8") as f:
-            f.write(result["text"])
-            
+            f.write("".join(segment["text"] for segment in segments))
+
+        if use_cache:
+            cache.store("transcript", cache_key, output_folder, ["transcript.txt", TRANSCRIPT_JOURNAL_FILE],
+                        video=os.path.basename(video_path), model=model_name)
         return transcript_path
-        
+
+    except TranscriptionCancelled:
+        raise
     except Exception as e:
-        raise Exception(f"Failed to transcribe video: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"Failed to transcribe video: {str(e)}")
+
+
+def start_transcription(video_path, output_folder, model_name=WHISPER_MODEL, workers=TRANSCRIBE_WORKERS,
+                        retry=False):
+    """
+    Runs transcribe_video on a background thread so it overlaps frame extraction
+
+    Calling again with the same video, folder and model returns the job already
+    started rather than a new one, including one that failed, so a failure is not
+    retried on every call. Starting a job stops the video's jobs for other models:
+    a queued one is cancelled and a running one stops after its current chunk.
+
+    Args:
+        retry (bool): Start the job again if it failed or was stopped
+
+    Returns:
+        concurrent.futures.Future: Resolves to the transcript path
+    """
+    key = (os.path.abspath(video_path), os.path.abspath(output_folder))
+    with _background_lock:
+        jobs = _background_jobs.setdefault(key, {})
+        job = jobs.get(model_name)
+        if job is not None and not (retry and job[0].done() and (job[0].cancelled() or job[0].exception())):
+            return job[0]
+
+        for other, (stale, cancel) in jobs.items():
+            if other != model_name and not stale.cancel():
+                cancel.set()
+        cancel = threading.Event()
+        future = _background_executor.submit(transcribe_video, video_path, output_folder, model_name,
+                                             workers, cancel=cancel)
+        jobs[model_name] = (future, cancel)
+        return future
+
+
+def transcription_error(job):
+    """The exception a finished background transcription failed with, or None if it succeeded or was stopped"""
+    if job.cancelled() or isinstance(job.exception(), TranscriptionCancelled):
+        return None
+    return job.exception()
@@ -94,7 +94,11 @@ Focus on these aspects:
    - Missing industry examples
    - Missing case studies
    - Missing practical applications
-   - Missing production considerations"""
+   - Missing production considerations
+
+Put each addition under a markdown heading that repeats the title of the section
+of the initial notes it belongs in. Use a new title only for content that belongs
+in none of the existing sections."""
 
 COMBINE_NOTES_PROMPT = """Combine the enhanced notes with the missing content.
 Follow these rules:
@@ -103,7 +107,13 @@ Follow these rules:
 3. Add missing comparisons after related concepts
 4. Add implementation examples where relevant
 5. Add visual elements where they best explain the concept
-6. Maintain clear section separation with headers"""
+6. Maintain clear section separation with headers
+
+Enhanced notes:
+{enhanced_notes}
+
+Missing content:
+{missing_content}"""
 
 QA_PROMPT = """Please provide detailed answers to these student questions:
 1. Give thorough explanations
@@ -113,7 +123,10 @@ QA_PROMPT = """Please provide detailed answers to these student questions:
 
 Format each answer as:
 Q: [Question]
-A: [Detailed answer]"""
+A: [Detailed answer]
+
+Student questions:
+{student_questions}"""
 
 # Student related constants
 STUDENT_INSTRUCTIONS = """You are a student reviewing lecture content with no prior knowledge.
@@ -136,6 +149,7 @@ INITIAL_NOTES_FILE = "step1_initial_notes.md"
 MISSING_CONTENT_FILE = "step2_missing_content.md"
 COMBINED_NOTES_FILE = "step3_combined_notes.md"
 STUDENT_QUESTIONS_FILE = "step4_student_questions.md"
+QA_ANSWERS_FILE = "step5_qa_answers.md"
 FINAL_NOTES_FILE = "lecture_notes.md"
 METADATA_FILE = "metadata.json"
 DEBUG_FOLDER = "debug"
@@ -154,3 +168,177 @@ TRANSCRIPT_PATH = 'transcription.txt'
 SSIM_THRESHOLD = 0.8
 FRAME_SKIP = 30
 CLEANUP_ENABLED = False
+
+# Frame sampling: 'read' decodes every frame, 'grab' skips decoding of frames that
+# are not compared, 'seek' jumps to each compared frame by position
+SAMPLING_MODES = ("read", "grab", "seek")
+FRAME_SAMPLING_MODE = "grab"
+
+# Scene change detection on grayscale frames downscaled to COMPARE_WIDTH: 'ssim'
+# runs SSIM on every sample, 'tiered' skips it when the mean absolute difference
+# is under PIXEL_DIFF_GATE_SCALE * (1 - threshold) gray levels. The gate is an
+# approximation and can miss small changes such as a single new bullet line
+CHANGE_DETECTORS = ("ssim", "tiered")
+CHANGE_DETECTOR = "ssim"
+COMPARE_WIDTH = 320
+PIXEL_DIFF_GATE_SCALE = 25.0
+
+# Number of processes scanning separate time ranges of the video (1 = sequential)
+EXTRACTION_WORKERS = 1
+
+# Pipelined extraction: a decoder thread feeds the comparison stage through a
+# bounded queue and scene images are encoded on a writer thread pool
+PIPELINED_EXTRACTION = True
+PIPELINE_QUEUE_SIZE = 8
+WRITER_THREADS = 2
+
+# Signature index: the COMPARE_WIDTH frames compared for every sample, kept so a
+# new threshold can be applied without decoding the video again
+BUILD_SIGNATURE_INDEX = True
+SIGNATURE_FOLDER = "signatures"
+
+# Adaptive sampling: coarse stride between samples, and how many frames after a
+# detected transition the scene image is captured
+ADAPTIVE_STRIDE_SECONDS = 3.0
+ADAPTIVE_SETTLE_FRAMES = 5
+
+# Slide region: None compares whole frames, 'auto' detects the static slide area
+# (excluding presenter webcams and cursors), or give a manual (x, y, w, h) crop
+SLIDE_REGION = "auto"
+SLIDE_REGION_SAMPLES = 24
+SLIDE_REGION_GRID_WIDTH = 64
+SLIDE_REGION_MOTION_THRESHOLD = 8
+SLIDE_REGION_MOTION_RATIO = 0.25
+SLIDE_REGION_MIN_AREA = 0.25
+
+# Local duplicate slide detection: difference hash grid size (hash bits = size**2),
+# the brightness step in gray levels that sets a hash bit, and the largest Hamming
+# distance for a candidate match. Candidates are confirmed
+# at COMPARE_WIDTH: in a grid DUPLICATE_GRID_CELLS cells wide, no cell may differ
+# by more than DUPLICATE_MAX_CELL_DIFF gray levels on average, so a slide that
+# gains one bullet line is not a repeat of the slide before it
+DUPLICATE_HASH_SIZE = 16
+DUPLICATE_HASH_MARGIN = 2
+DUPLICATE_HASH_DISTANCE = 12
+DUPLICATE_GRID_CELLS = 16
+DUPLICATE_MAX_CELL_DIFF = 8.0
+
+# Local blank/transition frame classifier. REMOVE_BLANK_SCENES classifies the
+# extracted scenes in one batch before they are shown for review; SKIP_BLANK_FRAMES
+# also checks each candidate during extraction, one frame at a time. Frames are
+# classified at BLANK_CLASSIFIER_WIDTH pixels wide
+REMOVE_BLANK_SCENES = True
+SKIP_BLANK_FRAMES = False
+BLANK_CLASSIFIER_WIDTH = 160
+BLANK_EDGE_THRESHOLD = 12
+BLANK_MAX_STD = 6.0
+BLANK_MIN_EDGE_DENSITY = 0.002
+BLANK_MIN_TEXT_ROWS = 0.05
+
+# Decode backend: 'opencv' uses cv2.VideoCapture, 'ffmpeg' streams gray frames
+# already scaled to COMPARE_WIDTH from an ffmpeg subprocess. KEYFRAMES_ONLY makes
+# the ffmpeg backend decode keyframes only (ignoring the frame skip)
+DECODE_BACKENDS = ("opencv", "ffmpeg")
+DECODE_BACKEND = "opencv"
+KEYFRAMES_ONLY = False
+FFMPEG_BINARY = "ffmpeg"
+
+# Whisper transcription: default model size and the memory budget for models
+# kept loaded between transcriptions
+WHISPER_MODELS = ("tiny", "base", "small", "medium", "large")
+WHISPER_MODEL = "base"
+WHISPER_CACHE_MAX_BYTES = 4 * 1024 ** 3
+
+# Parallel transcription: audio is split at silences found by an energy-based
+# voice activity detector and chunks are transcribed on TRANSCRIBE_WORKERS processes
+TRANSCRIBE_WORKERS = 1
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_SILENCE_SECONDS = 0.5
+VAD_ENERGY_RATIO = 0.1
+CHUNK_TARGET_SECONDS = 60
+CHUNK_MAX_SECONDS = 120
+
+# Decoded audio cache shared by transcription and audio analysis
+AUDIO_FOLDER = "audio"
+AUDIO_SAMPLE_RATE = 16000
+TRANSCRIPT_JOURNAL_FILE = "transcript.jsonl"
+
+# Content-addressed cache of transcripts, frame sets and notes shared by all output folders
+USE_ARTIFACT_CACHE = True
+ARTIFACT_CACHE_FOLDER = "artifact_cache"
+
+# When each saved scene occurs, written next to the scene images
+SCENE_MANIFEST_FILE = "scenes.json"
+
+# OpenAI client; OPENAI_BASE_URL of None uses the OpenAI API (or the OPENAI_BASE_URL environment variable)
+ASSISTANT_MODEL = "gpt-4o-mini"
+OPENAI_BASE_URL = None
+OPENAI_TIMEOUT = 600.0
+
+# Assistant runs: stream events instead of polling, and give up after this long
+STREAM_RUNS = True
+RUN_TIMEOUT_SECONDS = 600
+# Longest wait between polls of a run's status
+RUN_POLL_MAX_SECONDS = 5.0
+# Run statuses that end a request without a reply. The assistants have no tools,
+# so a run that requires action would only wait until it expires
+RUN_FAILED_STATUSES = ("failed", "cancelled", "expired", "incomplete", "requires_action")
+
+# Assistants and threads kept between runs, keyed by instructions and model
+USE_ASSISTANT_REGISTRY = True
+ASSISTANT_REGISTRY_FILE = "assistants.json"
+THREAD_POLICIES = ("reuse", "recycle")
+THREAD_POLICY = "recycle"
+ASSISTANT_MAX_AGE_DAYS = 30
+
+# Map-reduce notes for long transcripts: notes are drafted per chunk concurrently, then merged
+CHARS_PER_TOKEN = 4
+MAP_REDUCE_MIN_TOKENS = 12000
+NOTES_CHUNK_TOKENS = 4000
+NOTES_MAX_CONCURRENCY = 4
+
+CHUNK_NOTES_PROMPT = """Create detailed lecture notes for part {part} of {parts} of a lecture transcript.
+Cover only what this part says; other parts are handled separately and merged later.
+Follow the formatting guidelines to include:
+1. Mermaid diagrams where processes or flows are discussed
+2. Comparison tables for contrasting concepts
+3. Code examples where applicable
+4. Clear pros and cons lists
+5. Visual representations of key concepts
+
+Transcript part {part} of {parts}:
+{transcript}"""
+
+REDUCE_NOTES_PROMPT = """Merge these notes, written separately for consecutive parts of one lecture,
+into a single set of lecture notes.
+1. Keep the order of the lecture and one heading hierarchy for the whole document
+2. Merge sections that continue across parts and remove repeated introductions and summaries
+3. Keep every diagram, table, code example and list unless it duplicates another
+4. Do not add content that is not in the notes
+
+Notes by part:
+{partial_notes}"""
+
+# On-disk cache of assistant replies, evicted least recently used first
+USE_RESPONSE_CACHE = True
+RESPONSE_CACHE_FOLDER = "response_cache"
+RESPONSE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+RESPONSE_CACHE_MAX_AGE_DAYS = 30
+
+# Run independent note steps concurrently, each on a fresh thread
+PARALLEL_NOTE_STEPS = True
+
+# Merge the missing content into the notes locally, by matching section titles
+LOCAL_NOTES_MERGE = True
+SECTION_MATCH_THRESHOLD = 0.8
+
+PLACE_SECTIONS_PROMPT = """Choose where each fragment of additional content belongs in the lecture notes.
+Reply with one line per fragment in the form <fragment number>: <section number>.
+Use 0 for lecture content that belongs in none of the sections, and x for text
+that is not lecture content at all.
+
+Sections of the notes:
+{outline}
+
+Fragments:
+{fragments}"""
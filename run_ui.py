@@ -11,9 +11,11 @@ import nest_asyncio
 nest_asyncio.apply()
 
 # Core functionality imports
-from VideoTranscriber import transcribe_video
-from VideoFrameExtractor import extract_frames
+from VideoTranscriber import start_transcription, transcription_error, warm_model
+from VideoFrameExtractor import extract_frames, rethreshold_frames
 from LectureNotesCreator import LectureNotesCreator
+from DuplicateFrameFinder import remove_duplicate_frames
+from BlankFrameClassifier import remove_blank_frames
 from Utils import (
     get_output_folder,
     extract_scene_number
@@ -21,6 +23,9 @@ from Utils import (
 from constants import (
     SSIM_THRESHOLD,
     FRAME_SKIP,
+    REMOVE_BLANK_SCENES,
+    WHISPER_MODEL,
+    WHISPER_MODELS,
     TEACHER_INSTRUCTIONS,
     INITIAL_NOTES_PROMPT,
     MISSING_CONTENT_PROMPT,
@@ -38,8 +43,14 @@ def select_folder():
     folder_path = filedialog.askdirectory()
     return folder_path
 
+@st.cache_resource
+def warm_transcription_model(model_name):
+    """Starts loading the Whisper model once per process so the first transcription doesn't wait for it"""
+    return warm_model(model_name)
+
 def create_streamlit_app():
     st.set_page_config(page_title="Video Processing Pipeline", layout="wide")
+    warm_transcription_model(WHISPER_MODEL)
     st.title("Video Processing Pipeline")
 
     # API Key Configuration
@@ -59,6 +70,20 @@ def create_streamlit_app():
         else:
             st.warning("⚠️ Please enter your OpenAI API Key to use GPT features")
 
+        if api_key:
+            include_orphans = st.checkbox(
+                "Also delete unregistered 'Lecture' assistants",
+                value=False,
+                help="Deletes every 'Lecture ...' assistant on this API key that this folder's registry "
+                     "doesn't know, including ones used by other installs sharing the key"
+            )
+        if api_key and st.button("🧹 Clean Up Old Assistants",
+                                 help="Delete this app's assistants and threads that haven't been used recently"):
+            async def cleanup_assistants():
+                async with LectureNotesCreator(api_key) as notes_creator:
+                    return await notes_creator.registry.cleanup(include_orphans=include_orphans)
+            st.success(f"Deleted {asyncio.run(cleanup_assistants())} old assistants")
+
     # Check for API key before proceeding
     if not api_key:
         st.error("Please enter your OpenAI API Key in the sidebar to continue")
@@ -94,6 +119,19 @@ def create_streamlit_app():
             - Size: {uploaded_video.size/1024/1024:.2f} MB
             - Type: {uploaded_video.type}
             """)
+
+            # Save the video once and start transcribing it while frames are extracted and reviewed
+            output_folder = get_output_folder(uploaded_video.name)
+            video_path = os.path.join(output_folder, uploaded_video.name)
+            if not os.path.exists(video_path) or os.path.getsize(video_path) != uploaded_video.size:
+                with open(video_path, "wb") as f:
+                    f.write(uploaded_video.getbuffer())
+            transcription = start_transcription(video_path, output_folder)
+            if transcription.done() and transcription_error(transcription) is not None:
+                st.error(f"❌ Background transcription failed: {transcription_error(transcription)}")
+                if st.button("🔁 Retry Transcription"):
+                    start_transcription(video_path, output_folder, retry=True)
+                    st.rerun()
         else:
             st.warning("⚠️ Please upload a video file to begin - This is required!")
 
@@ -140,20 +178,27 @@ def create_streamlit_app():
                         output_folder = get_output_folder(uploaded_video.name)
                         video_path = os.path.join(output_folder, uploaded_video.name)
                         
-                        # Save uploaded video
-                        with open(video_path, "wb") as f:
-                            f.write(uploaded_video.getbuffer())
-                        
                         # Show progress message
                         progress_text = st.empty()
                         progress_text.text("Analyzing video and extracting frames...")
                         
-                        num_scenes = extract_frames(
+                        # Reuse the signature index from an earlier pass for new settings
+                        num_scenes = rethreshold_frames(
                             video_path=video_path,
                             output_folder=output_folder,
                             skip_frames=frame_skip,
                             ssim_threshold=ssim_threshold
                         )
+                        if num_scenes is None:
+                            num_scenes = extract_frames(
+                                video_path=video_path,
+                                output_folder=output_folder,
+                                skip_frames=frame_skip,
+                                ssim_threshold=ssim_threshold
+                            )
+                        if REMOVE_BLANK_SCENES:
+                            # Blank and transition frames are classified in one batch before review
+                            num_scenes = len(remove_blank_frames(output_folder))
                         
                         # Success message with stats
                         st.success(f"""
@@ -176,6 +221,10 @@ def create_streamlit_app():
                 image_files = [f for f in os.listdir(output_folder) if f.endswith('.png')]
                 if image_files:
                     st.info("👉 Review and delete any unwanted or duplicate frames below")
+                    if st.button("🧹 Remove Revisited Slides", help="Delete frames that repeat an earlier slide"):
+                        remaining = remove_duplicate_frames(output_folder)
+                        st.success(f"Removed {len(image_files) - len(remaining)} duplicate frames")
+                        st.rerun()
                     image_files.sort(key=extract_scene_number)
                     
                     # Create a grid layout
@@ -229,6 +278,19 @@ def create_streamlit_app():
         
         if uploaded_transcript:
             st.success(f"✅ Using uploaded transcript: {uploaded_transcript.name}")
+        else:
+            whisper_model = st.selectbox(
+                "Whisper Model",
+                WHISPER_MODELS,
+                index=WHISPER_MODELS.index(WHISPER_MODEL),
+                help="Larger models are more accurate but slower. Loaded models are kept in memory between runs"
+            )
+            if whisper_model == WHISPER_MODEL:
+                transcription = start_transcription(os.path.join(output_folder, uploaded_video.name), output_folder)
+                if not transcription.done():
+                    st.info("⏳ Transcribing in the background since upload...")
+                elif not transcription.cancelled() and transcription.exception() is None:
+                    st.success("✅ Transcript ready (transcribed in the background)")
 
         # Prompt Configuration
         st.subheader("2️⃣ Configure Prompts")
@@ -301,16 +363,16 @@ def create_streamlit_app():
                 }
                 
                 # 1. Handle Transcript
-                transcript_path = os.path.join(output_folder, "transcript.txt")
-                
                 if uploaded_transcript:
+                    # Kept apart from transcript.txt, which the background transcription writes
+                    transcript_path = os.path.join(output_folder, "uploaded_transcript.txt")
                     status_text.text("Using uploaded transcript...")
                     progress.progress(10)
                     with open(transcript_path, "wb") as f:
                         f.write(uploaded_transcript.getbuffer())
                     checklist_items["transcribe"].markdown("✅ Using uploaded transcript")
                 else:
-                    status_text.text("Generating transcript... This may take a few minutes...")
+                    status_text.text("Waiting for transcript... This may take a few minutes...")
                     progress.progress(10)
                     video_path = os.path.join(output_folder, uploaded_video.name)
                     
@@ -318,28 +380,49 @@ def create_streamlit_app():
                         with open(video_path, "wb") as f:
                             f.write(uploaded_video.getbuffer())
                     
-                    transcript_path = transcribe_video(
+                    # Joins the transcription started on upload, or starts one for another model,
+                    # which stops the upload's; a failed or stopped one is started again
+                    transcript_path = start_transcription(
                         video_path=video_path,
-                        output_folder=output_folder
-                    )
+                        output_folder=output_folder,
+                        model_name=whisper_model,
+                        retry=True
+                    ).result()
                     checklist_items["transcribe"].markdown("✅ Generated transcript")
 
                 # 2. Process with LectureNotesCreator
                 status_text.text("Processing transcript and generating notes...")
                 progress.progress(50)
                 
-                # Initialize LectureNotesCreator with API key and create notes
-                notes_creator = LectureNotesCreator(api_key)
-                
-                # Create and run the async task
+                # Show the assistants' replies as they stream in. Steps and forks run
+                # concurrently under their own role labels, so each keeps its own text;
+                # the most recently active ones are shown
+                live_reply = st.empty()
+                streamed = {}
+                recently_active = []
+
+                def show_tokens(role, text):
+                    streamed[role] = streamed.get(role, "") + text
+                    if role in recently_active:
+                        recently_active.remove(role)
+                    recently_active.append(role)
+                    del recently_active[:-4]
+                    live_reply.markdown("\n\n---\n\n".join(
+                        f"**{name} is writing...**\n\n{reply[-600:]}"
+                        for name, reply in streamed.items() if name in recently_active
+                    ))
+
+                # Create and run the async task; the creator's connections close with the task's event loop
                 async def process_notes():
-                    await notes_creator.create_notes(
-                        transcript_path=transcript_path,
-                        output_folder=output_folder
-                    )
+                    async with LectureNotesCreator(api_key, on_token=show_tokens) as notes_creator:
+                        await notes_creator.create_notes(
+                            transcript_path=transcript_path,
+                            output_folder=output_folder
+                        )
                 
                 # Run the async function
                 asyncio.run(process_notes())
+                live_reply.empty()
                 
                 checklist_items["process"].markdown("✅ Generated notes")
                 
@@ -0,0 +1,201 @@
+"""
+Local stand-in for the parts of the OpenAI Assistants API that LectureNotesCreator uses
+
+Assistants, threads and runs are kept in memory. Each reply names the length
+and start of the last message on the thread, so tests can tell what was sent.
+Runs for assistants or threads that were deleted fail with 404 like the real API,
+and runs end with run_status ("completed" unless a test asks for another).
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class MockAssistantsAPI:
+    """
+    Serves the mock API on a free local port in a background thread
+
+    Use as a context manager; base_url is what AsyncOpenAI should be given.
+    """
+    def __init__(self, latency=0.0, run_seconds=0.05, run_status="completed"):
+        self.latency = latency
+        self.run_seconds = run_seconds
+        self.run_status = run_status
+        self.assistants = {}
+        self.threads = {}
+        self.runs = {}
+        self.stats = {"requests": 0, "assistants": 0, "threads": 0, "runs": 0, "deleted": 0}
+        self.prompts = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def new_id(self, prefix):
+        with self._lock:
+            return f"{prefix}_{next(self._ids)}"
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def message(self, thread_id, role, text):
+        return {"id": self.new_id("msg"), "object": "thread.message", "created_at": int(time.time()),
+                "thread_id": thread_id, "role": role, "status": "completed", "assistant_id": None,
+                "run_id": None, "attachments": [], "metadata": {},
+                "content": [{"type": "text", "text": {"value": text, "annotations": []}}]}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, code=200):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self):
+                self._send({"error": {"message": "No such object", "type": "invalid_request_error"}}, 404)
+
+            def _body(self):
+                length = int(self.headers.get("content-length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _start(self):
+                time.sleep(api.latency)
+                api.count("requests")
+
+            def do_DELETE(self):
+                self._start()
+                match = re.match(r"/v1/(assistants|threads)/([^/?]+)$", self.path)
+                store = api.assistants if match and match.group(1) == "assistants" else api.threads
+                if match is None or store.pop(match.group(2), None) is None:
+                    return self._not_found()
+                api.count("deleted")
+                self._send({"id": match.group(2), "object": f"{match.group(1)[:-1]}.deleted", "deleted": True})
+
+            def do_GET(self):
+                self._start()
+                path = self.path.split("?")[0]
+                if path == "/v1/assistants":
+                    data = list(api.assistants.values())
+                    return self._send({"object": "list", "data": data, "has_more": False,
+                                       "first_id": data[0]["id"] if data else None,
+                                       "last_id": data[-1]["id"] if data else None})
+                match = re.match(r"/v1/threads/([^/]+)/runs/([^/]+)$", path)
+                if match:
+                    run = api.runs.get(match.group(2))
+                    if run is None:
+                        return self._not_found()
+                    if time.time() >= run["done_at"] and run["status"] == "queued":
+                        run["status"] = api.run_status
+                        if run["status"] == "completed":
+                            api.threads[run["thread_id"]].append(
+                                api.message(run["thread_id"], "assistant", run["reply"]))
+                    return self._send({key: value for key, value in run.items() if key not in ("done_at", "reply")})
+                match = re.match(r"/v1/threads/([^/]+)/messages$", path)
+                if match:
+                    if match.group(1) not in api.threads:
+                        return self._not_found()
+                    return self._send({"object": "list", "data": list(reversed(api.threads[match.group(1)])),
+                                       "has_more": False})
+                self._not_found()
+
+            def do_POST(self):
+                self._start()
+                body = self._body()
+                if self.path == "/v1/assistants":
+                    api.count("assistants")
+                    assistant = {"id": api.new_id("asst"), "object": "assistant", "created_at": int(time.time()),
+                                 "model": body["model"], "name": body.get("name"),
+                                 "instructions": body.get("instructions"), "tools": [], "metadata": {}}
+                    api.assistants[assistant["id"]] = assistant
+                    return self._send(assistant)
+                if self.path == "/v1/threads":
+                    api.count("threads")
+                    thread_id = api.new_id("thread")
+                    api.threads[thread_id] = []
+                    return self._send({"id": thread_id, "object": "thread", "created_at": int(time.time()),
+                                       "metadata": {}})
+                match = re.match(r"/v1/threads/([^/]+)/runs$", self.path)
+                if match:
+                    thread_id = match.group(1)
+                    if thread_id not in api.threads or body["assistant_id"] not in api.assistants:
+                        return self._not_found()
+                    return self._run(thread_id, body)
+                self._not_found()
+
+            def _run(self, thread_id, body):
+                api.count("runs")
+                thread = api.threads[thread_id]
+                for extra in body.get("additional_messages") or []:
+                    thread.append(api.message(thread_id, extra["role"], extra["content"]))
+                prompt = thread[-1]["content"][0]["text"]["value"]
+                api.prompts.append(prompt)
+                reply = f"ANSWER({len(prompt)}) to: {prompt.strip()[:40]}"
+                run = {"id": api.new_id("run"), "object": "thread.run", "created_at": int(time.time()),
+                       "thread_id": thread_id, "assistant_id": body["assistant_id"], "status": "queued",
+                       "instructions": "", "model": "gpt-4o-mini", "tools": [],
+                       "done_at": time.time() + api.run_seconds, "reply": reply}
+                if not body.get("stream"):
+                    api.runs[run["id"]] = run
+                    return self._send({key: value for key, value in run.items() if key not in ("done_at", "reply")})
+                self._stream(thread_id, run, reply)
+
+            def _stream(self, thread_id, run, reply):
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("transfer-encoding", "chunked")
+                self.end_headers()
+
+                def event(name, data):
+                    payload = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+                    self.wfile.flush()
+
+                public_run = {key: value for key, value in run.items() if key not in ("done_at", "reply")}
+                event("thread.run.created", public_run)
+                if api.run_status != "completed":
+                    time.sleep(api.run_seconds)
+                    event(f"thread.run.{api.run_status}", {**public_run, "status": api.run_status})
+                    return self._end_stream()
+                message = api.message(thread_id, "assistant", reply)
+                words = reply.split(" ")
+                for position, word in enumerate(words):
+                    time.sleep(api.run_seconds / len(words))
+                    event("thread.message.delta", {
+                        "id": message["id"], "object": "thread.message.delta",
+                        "delta": {"content": [{"index": 0, "type": "text",
+                                               "text": {"value": (" " if position else "") + word,
+                                                        "annotations": []}}]}})
+                api.threads[thread_id].append(message)
+                event("thread.message.completed", message)
+                event("thread.run.completed", {**public_run, "status": "completed"})
+                self._end_stream()
+
+            def _end_stream(self):
+                payload = b"event: done\ndata: [DONE]\n\n"
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,47 @@
+import json
+import os
+from ArtifactCache import ArtifactCache, artifact_key
+
+
+def test_keys_depend_on_stage_input_and_every_parameter():
+    key = artifact_key("frames", "hash", skip_frames=10, ssim_threshold=0.9)
+    assert key == artifact_key("frames", "hash", ssim_threshold=0.9, skip_frames=10)
+    assert key != artifact_key("transcript", "hash", skip_frames=10, ssim_threshold=0.9)
+    assert key != artifact_key("frames", "other", skip_frames=10, ssim_threshold=0.9)
+    assert key != artifact_key("frames", "hash", skip_frames=10, ssim_threshold=0.95)
+    assert key != artifact_key("frames", "hash", skip_frames=10, ssim_threshold=0.9, detector="ssim")
+
+
+def test_store_and_fetch_round_trip_into_another_folder(tmp_path):
+    source = tmp_path / "source"
+    (source / "debug").mkdir(parents=True)
+    (source / "scene_1.png").write_bytes(b"image")
+    (source / "debug" / "notes.md").write_text("notes")
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    key = artifact_key("frames", "hash")
+
+    assert not cache.contains("frames", key)
+    assert cache.fetch("frames", key, str(tmp_path / "target")) is None
+    cache.store("frames", key, str(source), ["scene_1.png", os.path.join("debug", "notes.md")], video="a.mp4")
+    assert cache.contains("frames", key)
+
+    target = tmp_path / "target"
+    assert cache.fetch("frames", key, str(target)) == ["scene_1.png", os.path.join("debug", "notes.md")]
+    assert (target / "scene_1.png").read_bytes() == b"image"
+    assert (target / "debug" / "notes.md").read_text() == "notes"
+    with open(tmp_path / "cache" / "frames" / key / "manifest.json") as f:
+        assert json.load(f)["video"] == "a.mp4"
+
+
+def test_an_existing_entry_is_not_overwritten(tmp_path):
+    cache = ArtifactCache(str(tmp_path / "cache"))
+    key = artifact_key("transcript", "hash")
+    (tmp_path / "transcript.txt").write_text("first")
+    cache.store("transcript", key, str(tmp_path), ["transcript.txt"])
+    (tmp_path / "transcript.txt").write_text("second")
+    cache.store("transcript", key, str(tmp_path), ["transcript.txt"])
+
+    cache.fetch("transcript", key, str(tmp_path / "out"))
+    assert (tmp_path / "out" / "transcript.txt").read_text() == "first"
+    # No staging folders are left behind
+    assert os.listdir(tmp_path / "cache" / "transcript") == [key]
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import time
+import pytest
+from openai import AsyncOpenAI
+from mock_assistants_api import MockAssistantsAPI
+import LectureNotesCreator
+from AssistantRegistry import AssistantRegistry
+from LectureNotesCreator import Assistant, LectureNotesCreator as NotesCreator
+
+
+@pytest.fixture
+def api():
+    with MockAssistantsAPI(run_seconds=0.3) as server:
+        yield server
+
+
+def client_for(api):
+    return AsyncOpenAI(api_key="sk-test", base_url=api.base_url, max_retries=0)
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_requests_overlap_on_one_event_loop(api, stream):
+    async def main():
+        client = client_for(api)
+        try:
+            assistants = [Assistant(client, f"Role {n}", "Be brief.", stream=stream) for n in range(3)]
+            # The first requests pay for one-time client and connection setup
+            await asyncio.gather(*[assistant.send_message("Warm up") for assistant in assistants])
+            start_time = time.perf_counter()
+            replies = await asyncio.gather(*[assistant.send_message(f"Question {n}")
+                                             for n, assistant in enumerate(assistants)])
+            return replies, time.perf_counter() - start_time
+        finally:
+            await client.close()
+
+    replies, elapsed = asyncio.run(main())
+    assert replies == [f"ANSWER(10) to: Question {n}" for n in range(3)]
+    # Three 0.3 s runs in parallel, not one after another (polling adds its first 1 s backoff)
+    assert elapsed < (0.8 if stream else 1.6)
+    assert api.stats["runs"] == 6
+
+
+def test_streamed_text_reaches_on_token(api):
+    pieces = []
+
+    async def main():
+        client = client_for(api)
+        try:
+            assistant = Assistant(client, "Teacher", "Be brief.", on_token=lambda role, text: pieces.append(text))
+            return await assistant.send_message("Hello there")
+        finally:
+            await client.close()
+
+    reply = asyncio.run(main())
+    assert "".join(pieces) == reply
+
+
+@pytest.mark.parametrize("stream", [True, False])
+@pytest.mark.parametrize("status", ["cancelled", "expired", "incomplete", "requires_action"])
+def test_runs_that_end_without_a_reply_fail_at_once(stream, status):
+    async def main():
+        client = client_for(api)
+        try:
+            return await Assistant(client, "Teacher", "Be brief.", stream=stream).send_message("Hello")
+        finally:
+            await client.close()
+
+    with MockAssistantsAPI(run_seconds=0.05, run_status=status) as api:
+        start_time = time.perf_counter()
+        with pytest.raises(Exception, match=f"Assistant run {status}"):
+            asyncio.run(main())
+    assert time.perf_counter() - start_time < 5
+
+
+def test_polling_waits_at_most_the_maximum_between_checks(api, monkeypatch):
+    monkeypatch.setattr(LectureNotesCreator, "INITIAL_RETRY_DELAY", 0.01)
+    monkeypatch.setattr(LectureNotesCreator, "BACKOFF_FACTOR", 10)
+    monkeypatch.setattr(LectureNotesCreator, "RUN_POLL_MAX_SECONDS", 0.05)
+
+    async def main():
+        client = client_for(api)
+        try:
+            start_time = time.perf_counter()
+            await Assistant(client, "Teacher", "Be brief.", stream=False).send_message("Hello")
+            return time.perf_counter() - start_time
+        finally:
+            await client.close()
+
+    # Uncapped, the checks would come 0.01, 0.1 and 1 s apart and miss the end of the 0.3 s run by 0.8 s
+    assert asyncio.run(main()) < 0.8
+
+
+def test_forks_recover_when_the_registered_assistant_was_deleted(api, tmp_path):
+    registry_path = str(tmp_path / "assistants.json")
+
+    async def ask(prompt):
+        client = client_for(api)
+        try:
+            registry = AssistantRegistry(client, registry_path)
+            parent = Assistant(client, "Teacher", "Be brief.", registry=registry)
+            fork = parent.fork("Teacher (part 1/2)")
+            other = parent.fork("Teacher (part 2/2)")
+            replies = await asyncio.gather(fork.send_message(prompt), other.send_message(prompt))
+            await asyncio.gather(fork.close_thread(), other.close_thread())
+            return replies, parent.thread_id
+        finally:
+            await client.close()
+
+    asyncio.run(ask("first"))
+    with open(registry_path) as f:
+        (stale_id,) = [entry["assistant_id"] for entry in json.load(f).values()]
+    api.assistants.pop(stale_id)  # Deleted elsewhere
+
+    replies, parent_thread = asyncio.run(ask("second"))
+    assert replies == ["ANSWER(6) to: second"] * 2
+    with open(registry_path) as f:
+        (entry,) = json.load(f).values()
+    assert entry["assistant_id"] != stale_id and entry["assistant_id"] in api.assistants
+    # Only one replacement was created for both forks, and the parent never needed a thread
+    assert api.stats["assistants"] == 2
+    assert parent_thread is None
+
+
+def test_create_notes_end_to_end(api, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transcript_path = tmp_path / "transcript.txt"
+    transcript_path.write_text("Today we cover graph search. " * 20)
+    output_folder = str(tmp_path / "notes")
+
+    async def create(parallel):
+        monkeypatch.setattr(LectureNotesCreator, "PARALLEL_NOTE_STEPS", parallel)
+        async with NotesCreator("sk-test", base_url=api.base_url, use_response_cache=False) as creator:
+            await creator.create_notes(str(transcript_path), output_folder, use_cache=False)
+
+    asyncio.run(create(parallel=True))
+    with open(os.path.join(output_folder, "lecture_notes.md")) as f:
+        notes = f.read()
+    assert notes.startswith("ANSWER(") and "# Questions and Answers" in notes
+    debug_files = os.listdir(os.path.join(output_folder, "debug"))
+    assert {"step1_initial_notes.md", "step3_combined_notes.md", "step5_qa_answers.md"} <= set(debug_files)
+    runs = api.stats["runs"]
+
+    # Every step is checkpointed, so a rerun with the same inputs makes no requests
+    asyncio.run(create(parallel=True))
+    assert api.stats["runs"] == runs
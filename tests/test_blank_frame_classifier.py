@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+from BlankFrameClassifier import classify_blank_frames, remove_blank_frames, to_classifier_input
+
+SHAPE = (720, 1280, 3)
+
+
+def text_slide(lines, background=(245, 245, 245), color=(30, 30, 30), scale=2.0, top=300):
+    frame = np.empty(SHAPE, np.uint8)
+    frame[:] = background
+    for number, line in enumerate(lines):
+        cv2.putText(frame, line, (120, top + 110 * number), cv2.FONT_HERSHEY_SIMPLEX, scale, color, 4)
+    return frame
+
+
+def noisy(frame, sigma=3, seed=0):
+    return np.clip(frame + np.random.default_rng(seed).normal(0, sigma, frame.shape), 0, 255).astype(np.uint8)
+
+
+CONTENT = {
+    "title": text_slide(["Linear Algebra", "Lecture 3"], scale=3.0),
+    "section": text_slide(["Part 2"], background=(90, 40, 20), color=(255, 255, 255)),
+    "small heading": text_slide(["Questions?"], scale=1.2, top=360),
+    "low contrast": text_slide(["Summary"], color=(205, 205, 205)),
+    "bullets": text_slide(["- first point", "- second point", "- third point"], scale=1.5, top=200),
+    "half faded": cv2.addWeighted(text_slide(["Part 2"]), 0.3, np.zeros(SHAPE, np.uint8), 0.7, 0),
+}
+BLANK = {
+    "black": np.zeros(SHAPE, np.uint8),
+    "white": np.full(SHAPE, 255, np.uint8),
+    "noisy black": noisy(np.zeros(SHAPE, np.uint8) + 16),
+    "fade": cv2.addWeighted(text_slide(["Part 2"]), 0.04, np.zeros(SHAPE, np.uint8), 0.96, 0),
+    "plain background": noisy(np.full(SHAPE, (90, 40, 20), np.uint8)),
+}
+
+
+def classify(frames):
+    return classify_blank_frames(np.stack([to_classifier_input(frame) for frame in frames]))
+
+
+def test_title_section_and_sparse_slides_have_content():
+    assert dict(zip(CONTENT, classify(CONTENT.values()))) == dict.fromkeys(CONTENT, False)
+
+
+def test_black_white_faded_and_empty_frames_are_blank():
+    assert dict(zip(BLANK, classify(BLANK.values()))) == dict.fromkeys(BLANK, True)
+
+
+def test_remove_blank_frames_deletes_only_blank_scenes(tmp_path):
+    frames = [CONTENT["title"], BLANK["black"], CONTENT["section"], BLANK["fade"]]
+    for number, frame in enumerate(frames, start=1):
+        cv2.imwrite(str(tmp_path / f"scene_{number}.png"), frame)
+    assert remove_blank_frames(str(tmp_path)) == ["scene_1.png", "scene_3.png"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["scene_1.png", "scene_3.png"]
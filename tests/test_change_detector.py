@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+from skimage.metrics import structural_similarity as ssim
+from VideoFrameExtractor import ChangeDetector
+
+
+def slide(bullets, shape=(720, 1280)):
+    frame = np.full(shape + (3,), 240, np.uint8)
+    cv2.putText(frame, "Title", (60, 120), cv2.FONT_HERSHEY_SIMPLEX, 3, (20, 20, 20), 6)
+    for bullet in range(bullets):
+        cv2.putText(frame, f"- point {bullet}", (100, 240 + 90 * bullet), cv2.FONT_HERSHEY_SIMPLEX, 2,
+                    (20, 20, 20), 4)
+    return frame
+
+
+def test_both_detectors_score_ssim_on_downscaled_frames():
+    detector = ChangeDetector(0.9, "ssim", compare_width=320)
+    first, second = detector.signature(slide(1)), detector.signature(slide(2))
+    assert first.shape == (180, 320)
+    small = [cv2.resize(cv2.cvtColor(slide(n), cv2.COLOR_BGR2GRAY), (320, 180), interpolation=cv2.INTER_AREA)
+             for n in (1, 2)]
+    assert detector.score(first, second) == ssim(*small)
+
+    tiered = ChangeDetector(0.9, "tiered", compare_width=320, pixel_diff_gate=0.0)
+    assert tiered.score(first, second) == detector.score(first, second)
+
+
+def test_the_gate_skips_ssim_for_unchanged_frames_only():
+    detector = ChangeDetector(0.95, "tiered")
+    signature = detector.signature(slide(2))
+    assert detector.score(signature, detector.signature(slide(2))) == 1.0
+    assert detector.gated == 1 and detector.ssim_calls == 0
+
+    assert detector.is_new_scene(detector.score(signature, detector.signature(255 - slide(2))))
+    assert detector.ssim_calls == 1
+
+
+def test_region_is_cropped_after_downscaling():
+    detector = ChangeDetector(0.9, "ssim", compare_width=320, roi=(80, 160, 1120, 480))
+    assert detector.signature(slide(1)).shape == (120, 280)
+    # Frames decoded at the compare width take the region in video pixels
+    detector.frame_shape = (720, 1280)
+    gray = cv2.resize(cv2.cvtColor(slide(1), cv2.COLOR_BGR2GRAY), (320, 180), interpolation=cv2.INTER_AREA)
+    assert detector.signature(gray).shape == (120, 280)
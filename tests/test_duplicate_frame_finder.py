@@ -0,0 +1,57 @@
+import random
+import cv2
+import numpy as np
+from DuplicateFrameFinder import BKTree, find_duplicate_frames, hamming_distance, remove_duplicate_frames
+
+
+def bullet_slide(bullets, title="Agenda"):
+    frame = np.full((720, 1280, 3), 245, np.uint8)
+    cv2.putText(frame, title, (60, 110), cv2.FONT_HERSHEY_SIMPLEX, 2.5, (30, 30, 30), 5)
+    for bullet in range(bullets):
+        cv2.putText(frame, f"- Bullet point number {bullet + 1} here", (100, 220 + 90 * bullet),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, (30, 30, 30), 3)
+    return frame
+
+
+def reencoded(frame, seed):
+    """The same slide captured again: sensor noise and lossy compression"""
+    noisy = np.clip(frame + np.random.default_rng(seed).normal(0, 4, frame.shape), 0, 255).astype(np.uint8)
+    return cv2.imdecode(cv2.imencode(".jpg", noisy, [cv2.IMWRITE_JPEG_QUALITY, 40])[1], cv2.IMREAD_COLOR)
+
+
+def write_scenes(folder, frames):
+    for number, frame in enumerate(frames, start=1):
+        cv2.imwrite(str(folder / f"scene_{number}.png"), frame)
+
+
+def test_bullet_builds_are_not_duplicates(tmp_path):
+    write_scenes(tmp_path, [bullet_slide(bullets) for bullets in range(1, 6)])
+    assert find_duplicate_frames(str(tmp_path)) == []
+    assert len(remove_duplicate_frames(str(tmp_path))) == 5
+
+
+def test_revisited_slides_are_found_after_other_slides(tmp_path):
+    builds = [bullet_slide(bullets) for bullets in range(1, 4)]
+    write_scenes(tmp_path, builds + [bullet_slide(2, "Summary"), reencoded(builds[1], 1), reencoded(builds[2], 2)])
+    duplicates = find_duplicate_frames(str(tmp_path))
+    assert [(duplicate, original) for duplicate, original, _ in duplicates] == [
+        ("scene_5.png", "scene_2.png"), ("scene_6.png", "scene_3.png")]
+    assert remove_duplicate_frames(str(tmp_path)) == [f"scene_{number}.png" for number in range(1, 5)]
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(300)]
+    # Near copies so that small radii have matches
+    hashes += [value ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for value in hashes[:100]]
+    tree = BKTree()
+    for number, value in enumerate(hashes):
+        tree.add(value, number)
+    assert tree.size == len(hashes)
+
+    for query in hashes[:50] + [rng.getrandbits(64) for _ in range(20)]:
+        for radius in (0, 2, 5, 20):
+            expected = sorted((hamming_distance(query, value), number) for number, value in enumerate(hashes)
+                              if hamming_distance(query, value) <= radius)
+            assert sorted(tree.search(query, radius)) == expected
+    assert BKTree().search(0, 5) == []
@@ -0,0 +1,92 @@
+import json
+import os
+import cv2
+import numpy as np
+import pytest
+import VideoFrameExtractor
+from FrameSignatureIndex import FrameSignatureIndex, downscale_gray, scale_region, thumbnail_shape
+from VideoFrameExtractor import extract_frames, rethreshold_frames
+from constants import SCENE_MANIFEST_FILE
+
+FRAME_COUNT = 300
+SLIDE_STARTS = [0, 60, 130, 210]
+
+
+@pytest.fixture(scope="module")
+def noisy_video(tmp_path_factory):
+    """Bullet slides at 640x360 with mild sensor noise on every frame"""
+    path = str(tmp_path_factory.mktemp("video") / "noisy.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (640, 360))
+    rng = np.random.default_rng(0)
+    for frame_index in range(FRAME_COUNT):
+        slide = sum(start <= frame_index for start in SLIDE_STARTS)
+        frame = np.full((360, 640, 3), 235, np.uint8)
+        cv2.putText(frame, "Title", (30, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (20, 20, 20), 3)
+        for bullet in range(slide):
+            cv2.putText(frame, f"- point {bullet}", (50, 120 + 50 * bullet), cv2.FONT_HERSHEY_SIMPLEX, 1,
+                        (20, 20, 20), 2)
+        noise = rng.normal(0, 4, frame.shape)
+        writer.write(np.clip(frame + noise, 0, 255).astype(np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def no_windows(monkeypatch):
+    monkeypatch.setattr(VideoFrameExtractor.cv2, "destroyAllWindows", lambda: None)
+
+
+def manifest(folder):
+    with open(os.path.join(folder, SCENE_MANIFEST_FILE)) as f:
+        return [(scene["frame_index"], round(scene["ssim"] or 0, 6)) for scene in json.load(f)["scenes"]]
+
+
+def extract(video_path, folder, skip_frames, threshold, slide_region=None, build_index=False):
+    extract_frames(video_path, str(folder), skip_frames, threshold, sampling_mode="read", detector="ssim",
+                   pipelined=False, build_index=build_index, slide_region=slide_region, use_cache=False)
+    return manifest(folder)
+
+
+@pytest.mark.parametrize("slide_region", [None, (20, 80, 600, 260)])
+def test_rethresholding_gives_the_scenes_of_a_fresh_extraction(noisy_video, tmp_path, slide_region):
+    indexed = tmp_path / "indexed"
+    extract(noisy_video, indexed, 10, 0.5, slide_region, build_index=True)
+    for skip_frames, threshold in [(10, 0.8), (10, 0.95), (20, 0.9)]:
+        assert rethreshold_frames(noisy_video, str(indexed), skip_frames, threshold, detector="ssim",
+                                  slide_region=slide_region, use_cache=False) is not None
+        fresh = extract(noisy_video, tmp_path / f"fresh_{skip_frames}_{threshold}", skip_frames, threshold,
+                        slide_region)
+        assert manifest(indexed) == fresh
+
+
+def test_the_settings_of_the_indexing_pass_are_left_to_extract_frames(noisy_video, tmp_path):
+    extract(noisy_video, tmp_path, 10, 0.9, build_index=True)
+    assert rethreshold_frames(noisy_video, str(tmp_path), 10, 0.9, detector="ssim", slide_region=None,
+                              use_cache=False) is None
+    assert rethreshold_frames(noisy_video, str(tmp_path), 10, 0.8, detector="ssim", slide_region=None,
+                              use_cache=False) is not None
+
+
+def test_load_rejects_other_skip_rates_and_videos(noisy_video, tmp_path):
+    extract(noisy_video, tmp_path, 10, 0.9, build_index=True)
+    index = FrameSignatureIndex(str(tmp_path))
+    assert index.load(noisy_video, 30)
+    assert [frame_index for frame_index, _ in index.samples(30)] == list(range(29, FRAME_COUNT, 30))
+    assert index.thumbnails.shape[1:] == (180, 320)
+    assert not FrameSignatureIndex(str(tmp_path)).load(noisy_video, 15)
+
+    other = tmp_path / "other.avi"
+    with open(noisy_video, "rb") as source, open(other, "wb") as target:
+        target.write(source.read()[:-1024])
+    assert not FrameSignatureIndex(str(tmp_path)).load(str(other), 10)
+
+
+def test_downscaling_and_region_scaling():
+    frame = np.arange(360 * 640, dtype=np.uint32).reshape(360, 640).astype(np.uint8)
+    assert thumbnail_shape(frame.shape, 320) == (180, 320)
+    assert downscale_gray(frame, 320).shape == (180, 320)
+    # Frames no wider than the target are compared as they are
+    assert downscale_gray(frame, 640) is frame
+    assert scale_region((20, 80, 600, 260), (360, 640), (180, 320)) == (10, 40, 300, 130)
+    assert scale_region((0, 0, 8, 8), (360, 640), (180, 320)) == (0, 0, 7, 7)
+    assert scale_region(None, (360, 640), (180, 320)) is None
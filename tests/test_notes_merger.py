@@ -0,0 +1,100 @@
+from NotesMerger import merge_sections, outline, parse_sections, end_section
+
+NOTES = """# Graphs
+
+Intro.
+
+## 1. Breadth-First Search
+
+Visits level by level.
+
+```python
+# a comment, not a heading
+queue = [start]
+```
+
+### Complexity
+
+O(V + E).
+
+## 2. Depth-First Search 🌲
+
+Goes deep first.
+"""
+
+
+def test_code_fence_lines_are_not_headings():
+    root = parse_sections(NOTES)
+    titles = [section.title for section in root.walk() if section is not root]
+    assert titles == ["Graphs", "1. Breadth-First Search", "Complexity", "2. Depth-First Search 🌲"]
+
+
+def test_render_without_additions_keeps_the_notes():
+    root, unplaced = merge_sections(NOTES, "")
+    assert root.render() == NOTES.strip()
+    assert unplaced == []
+
+
+def test_sections_go_under_fuzzily_matching_headings():
+    additions = """## Missing Technical Elements
+
+### Breadth first search
+- Uses a FIFO queue.
+
+### Depth-first search
+- Uses a stack.
+"""
+    root, unplaced = merge_sections(NOTES, additions)
+    merged = root.render()
+    assert unplaced == []
+    # Added after the section's own text, ahead of its subsections
+    assert merged.index("Visits level by level.") < merged.index("- Uses a FIFO queue.") < merged.index("### Complexity")
+    assert merged.index("Goes deep first.") < merged.index("- Uses a stack.")
+    # The category heading had no text of its own
+    assert "Missing Technical Elements" not in merged
+
+
+def test_unmatched_subsections_stay_under_their_placed_parent():
+    additions = """## Breadth-First Search
+
+### Bidirectional variant
+Search from both ends.
+"""
+    root, unplaced = merge_sections(NOTES, additions)
+    assert unplaced == []
+    bfs = next(section for section in root.walk() if section.title == "1. Breadth-First Search")
+    assert [child.title for child in bfs.children] == ["Complexity", "Bidirectional variant"]
+    assert bfs.children[-1].heading == "### Bidirectional variant"
+
+
+def test_headings_are_releveled_to_fit():
+    additions = """# Breadth-First Search
+
+## Bidirectional variant
+Search from both ends.
+"""
+    root, _ = merge_sections(NOTES, additions)
+    assert "### Bidirectional variant" in root.render()
+
+
+def test_unmatched_sections_and_preamble_are_returned():
+    additions = """Here is what is missing.
+
+## Topological Sorting
+Orders a DAG.
+"""
+    root, unplaced = merge_sections(NOTES, additions)
+    assert [section.render() for section in unplaced] == ["Here is what is missing.",
+                                                          "## Topological Sorting\nOrders a DAG."]
+    assert "Topological" not in root.render()
+
+
+def test_outline_and_end_section():
+    root = parse_sections(NOTES)
+    sections, text = outline(root)
+    assert text.splitlines() == ["[1] Graphs", "  [2] 1. Breadth-First Search", "    [3] Complexity",
+                                 "  [4] 2. Depth-First Search 🌲"]
+    fragment = parse_sections("## Topological Sorting\nOrders a DAG.").children[0]
+    end_section(root).attach(fragment)
+    assert root.render().endswith("## Topological Sorting\nOrders a DAG.")
+    assert sections[0] is end_section(root)
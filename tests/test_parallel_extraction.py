@@ -0,0 +1,77 @@
+import json
+import os
+import cv2
+import numpy as np
+import pytest
+import VideoFrameExtractor
+from VideoFrameExtractor import extract_frames
+from constants import SCENE_MANIFEST_FILE
+
+# Slide changes, including ones just before and after the 3-worker chunk edges at frames 120 and 240
+SLIDE_STARTS = [0, 50, 118, 122, 200, 239, 241, 300]
+FRAME_COUNT = 360
+
+
+@pytest.fixture(scope="module")
+def lecture_video(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("video") / "lecture.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 180))
+    for frame_index in range(FRAME_COUNT):
+        slide = sum(start <= frame_index for start in SLIDE_STARTS) - 1
+        frame = np.full((180, 320, 3), 255, np.uint8)
+        cv2.putText(frame, f"Slide {slide}", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+        cv2.rectangle(frame, (20 + 30 * slide, 100), (60 + 30 * slide, 160), (0, 0, 200), -1)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def run(video_path, output_folder, workers, monkeypatch):
+    monkeypatch.setattr(VideoFrameExtractor.cv2, "destroyAllWindows", lambda: None)
+    count = extract_frames(video_path, str(output_folder), 2, 0.95, sampling_mode="read", detector="ssim",
+                           workers=workers, pipelined=False, build_index=False, slide_region=None,
+                           use_cache=False)
+    with open(os.path.join(output_folder, SCENE_MANIFEST_FILE)) as f:
+        scenes = json.load(f)["scenes"]
+    images = [cv2.imread(os.path.join(output_folder, f"scene_{number}.png")) for number in range(1, count + 1)]
+    return count, [(scene["frame_index"], scene["ssim"]) for scene in scenes], images
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_run_matches_the_sequential_run(lecture_video, tmp_path, monkeypatch, workers):
+    sequential = run(lecture_video, tmp_path / "sequential", 1, monkeypatch)
+    parallel = run(lecture_video, tmp_path / "parallel", workers, monkeypatch)
+
+    assert parallel[0] == sequential[0] == len(SLIDE_STARTS)
+    # Frame indices and scores; only the first scene has no score
+    assert parallel[1] == sequential[1]
+    assert [score is None for _, score in parallel[1]] == [True] + [False] * (len(SLIDE_STARTS) - 1)
+    assert all(np.array_equal(a, b) for a, b in zip(parallel[2], sequential[2]))
+    # Chunk working folders are removed after the merge
+    assert not [name for name in os.listdir(tmp_path / "parallel") if name.startswith(".chunk_")]
+
+
+def test_frame_cache_key_covers_settings_that_change_the_scenes(lecture_video, monkeypatch):
+    def key(**overrides):
+        return VideoFrameExtractor._frame_cache_key(lecture_video, 5, 0.9, "ssim", None, "opencv", **overrides)
+
+    base = key(sampling_mode="grab")
+    assert key(sampling_mode="grab") == base
+    assert key(sampling_mode="seek") != base
+    assert key(sampling_mode="grab", compare_width=160) != base
+    monkeypatch.setattr(VideoFrameExtractor, "PIXEL_DIFF_GATE_SCALE", 10.0)
+    assert key(sampling_mode="grab") != base
+    monkeypatch.setattr(VideoFrameExtractor, "SKIP_BLANK_FRAMES", True)
+    skip_blank = key(sampling_mode="grab")
+    monkeypatch.setattr("BlankFrameClassifier.BLANK_MAX_STD", 12.0)
+    assert key(sampling_mode="grab") != skip_blank
+
+
+def test_frame_cache_key_covers_the_slide_region_detection_settings(lecture_video, monkeypatch):
+    def key(slide_region):
+        return VideoFrameExtractor._frame_cache_key(lecture_video, 5, 0.9, "ssim", slide_region, "opencv", "grab")
+
+    auto, manual = key("auto"), key((0, 0, 100, 100))
+    monkeypatch.setattr("SlideRegionDetector.SLIDE_REGION_MOTION_THRESHOLD", 20)
+    assert key("auto") != auto
+    assert key((0, 0, 100, 100)) == manual
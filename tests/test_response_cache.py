@@ -0,0 +1,51 @@
+import os
+import time
+from ResponseCache import ResponseCache, context_after
+
+
+def test_replies_are_keyed_by_every_part_of_the_request(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = ResponseCache.key("gpt-4o-mini", "Be brief", "context", "Summarize")
+    assert cache.get(key) is None
+    cache.put(key, "Summary")
+    assert cache.get(key) == "Summary"
+    assert cache.stats() == "1 hits, 1 misses"
+
+    for other in [("gpt-4o", "Be brief", "context", "Summarize"), ("gpt-4o-mini", "Be long", "context", "Summarize"),
+                  ("gpt-4o-mini", "Be brief", "other", "Summarize"), ("gpt-4o-mini", "Be brief", "context", "List")]:
+        assert ResponseCache.key(*other) != key
+    # The parts can't run into each other
+    assert ResponseCache.key("a", "bc", "", "") != ResponseCache.key("ab", "c", "", "")
+
+
+def test_context_after_depends_on_the_whole_exchange():
+    context = context_after("", "Prompt", "Reply")
+    assert context == context_after("", "Prompt", "Reply")
+    assert context != context_after("", "Prompt", "Other reply")
+    assert context_after(context, "Next", "Reply") != context_after("", "Next", "Reply")
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 6)
+    now = time.time()
+    for number in range(3):
+        cache.put(f"key{number}", "x" * 1000)
+        os.utime(cache._path(f"key{number}"), (now - 100 + number, now - 100 + number))
+    # Reading key0 makes it the most recently used
+    assert cache.get("key0") is not None
+
+    cache.max_bytes = 2500
+    cache.evict()
+    assert cache.get("key1") is None
+    assert cache.get("key0") is not None and cache.get("key2") is not None
+
+
+def test_entries_unused_for_max_age_days_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_days=1)
+    cache.put("old", "reply")
+    cache.put("new", "reply")
+    two_days_ago = time.time() - 2 * 24 * 3600
+    os.utime(cache._path("old"), (two_days_ago, two_days_ago))
+    cache.evict()
+    assert cache.get("old") is None
+    assert cache.get("new") == "reply"
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("whisper")
+import VideoTranscriber  # noqa: E402
+
+RATE = 1000
+
+
+def speech_with_pauses(pauses, seconds, pause_seconds=1.0):
+    """Noise at speech level with silent gaps starting at the given seconds"""
+    audio = np.random.default_rng(0).normal(0, 0.3, seconds * RATE).astype(np.float32)
+    for start in pauses:
+        audio[int(start * RATE):int((start + pause_seconds) * RATE)] = 0
+    return audio
+
+
+def test_silences_shorter_than_the_minimum_are_ignored():
+    audio = speech_with_pauses([10], 30)
+    audio[20 * RATE:int(20.2 * RATE)] = 0
+    silences = VideoTranscriber.find_silences(audio, RATE, frame_seconds=0.03, min_silence_seconds=0.5)
+    assert len(silences) == 1
+    start, end = silences[0]
+    assert 10 * RATE <= start and end <= 11 * RATE and end - start >= 0.5 * RATE
+
+
+def test_chunks_cut_at_the_first_silence_after_the_target():
+    audio = speech_with_pauses([30, 70, 75, 140], 200)
+    chunks = VideoTranscriber.split_on_silence(audio, RATE, target_seconds=60, max_seconds=120)
+    cuts = [end / RATE for _, end in chunks[:-1]]
+    # 70 is the first pause at least 60 s into the chunk; 140 is 60 s after the cut at 70.5
+    assert cuts == pytest.approx([70.5, 140.5], abs=0.05)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+
+
+def test_chunks_without_a_silence_are_cut_at_the_maximum():
+    audio = speech_with_pauses([], 300)
+    chunks = VideoTranscriber.split_on_silence(audio, RATE, target_seconds=60, max_seconds=120)
+    assert chunks == [(0, 120 * RATE), (120 * RATE, 240 * RATE), (240 * RATE, 300 * RATE)]
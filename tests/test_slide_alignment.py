@@ -0,0 +1,52 @@
+import json
+import cv2
+import numpy as np
+from SlideAlignment import SlideTranscriptIndex, load_slide_index
+from TranscriptJournal import TranscriptJournal
+from constants import SCENE_MANIFEST_FILE
+
+SCENES = [{"scene": 1, "time": 0.0}, {"scene": 2, "time": 10.0}, {"scene": 3, "time": 25.0}]
+
+
+def segments(*bounds):
+    return [{"id": number, "start": start, "end": end, "text": f" s{number}"}
+            for number, (start, end) in enumerate(bounds)]
+
+
+def test_segments_belong_to_the_slide_shown_at_their_midpoint():
+    # The third segment straddles the change at 10 s but is mostly after it
+    index = SlideTranscriptIndex(SCENES, segments((0, 4), (4, 9), (8, 14), (14, 24), (24, 27), (27, 40)))
+    assert index.text_for(1) == "s0 s1"
+    assert index.text_for(2) == "s2 s3"
+    assert index.text_for(3) == "s4 s5"
+    assert index.span(2) == (10.0, 25.0)
+    assert index.span(3) == (25.0, 40)
+    assert [index.scene_at(seconds) for seconds in (0, 9.9, 10, 30)] == [1, 1, 2, 3]
+
+
+def test_slides_without_speech_have_no_text_and_no_section_marker():
+    index = SlideTranscriptIndex(SCENES, segments((0, 5), (26, 30)))
+    assert index.text_for(2) == ""
+    assert index.sectioned_text() == "[Slide 1, 00:00]\ns0\n\n[Slide 3, 00:25]\ns1"
+    assert index.text() == " s0 s1"
+
+
+def test_deleted_scenes_give_their_text_to_the_slide_before(tmp_path):
+    manifest = {"fps": 30, "scenes": [dict(scene, frame_index=int(scene["time"] * 30), ssim=None)
+                                      for scene in SCENES]}
+    (tmp_path / SCENE_MANIFEST_FILE).write_text(json.dumps(manifest))
+    for scene in (1, 3):
+        cv2.imwrite(str(tmp_path / f"scene_{scene}.png"), np.zeros((8, 8, 3), np.uint8))
+    journal = TranscriptJournal(str(tmp_path)).open({"audio": "hash"})
+    journal.append_chunk(segments((0, 4), (12, 16), (26, 30)), 30.0)
+    journal.mark_complete()
+    journal.close()
+
+    index = load_slide_index(str(tmp_path))
+    assert 2 not in index
+    assert index.text_for(1) == "s0 s1"
+    assert index.text_for(3) == "s2"
+
+
+def test_load_without_a_manifest_is_none(tmp_path):
+    assert load_slide_index(str(tmp_path)) is None
@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from StepGraph import Step, run_steps, critical_path
+
+
+def test_independent_steps_run_concurrently():
+    async def wait(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    steps = [
+        Step("a", ("start",), wait),
+        Step("b", ("a",), wait),
+        Step("c", ("a",), wait),
+        Step("d", ("b", "c"), lambda b, c: wait(b + c)),
+    ]
+    start_time = time.perf_counter()
+    values, timings = asyncio.run(run_steps(steps, {"start": "x"}))
+
+    assert values["d"] == "xx"
+    # a, then b and c together, then d: three steps of wall time, not four
+    assert time.perf_counter() - start_time < 0.7
+    assert timings["b"][0] < timings["c"][1] and timings["c"][0] < timings["b"][1]
+
+
+def test_inputs_are_passed_in_declared_order():
+    async def join(*parts):
+        return "".join(parts)
+
+    steps = [Step("first", (), lambda: join("1")), Step("second", (), lambda: join("2")),
+             Step("joined", ("second", "first", "extra"), join)]
+    values, _ = asyncio.run(run_steps(steps, {"extra": "3"}))
+    assert values["joined"] == "213"
+
+
+def test_unknown_input_is_rejected():
+    with pytest.raises(ValueError, match="missing_step"):
+        asyncio.run(run_steps([Step("a", ("missing_step",), lambda value: value)]))
+
+
+def test_failure_propagates_and_cancels_dependents():
+    async def fail():
+        raise RuntimeError("step failed")
+
+    ran = []
+
+    async def dependent(value):
+        ran.append(value)
+
+    with pytest.raises(RuntimeError, match="step failed"):
+        asyncio.run(run_steps([Step("a", (), fail), Step("b", ("a",), dependent)]))
+    assert ran == []
+
+
+def test_critical_path_follows_the_longest_dependency_chain():
+    steps = [Step("a", (), None), Step("b", ("a",), None), Step("c", ("a",), None), Step("d", ("b", "c"), None)]
+    timings = {"a": (0.0, 1.0), "b": (1.0, 1.5), "c": (1.0, 4.0), "d": (4.0, 5.0)}
+    path, seconds = critical_path(steps, timings)
+    assert path == ["a", "c", "d"]
+    assert seconds == pytest.approx(5.0)
@@ -0,0 +1,36 @@
+from TranscriptChunker import chunk_transcript, estimate_tokens
+
+
+def paragraph(number, sentences=6):
+    return " ".join(f"Paragraph {number} makes point {sentence} about the topic." for sentence in range(sentences))
+
+
+def test_chunks_fit_the_budget_and_keep_every_word():
+    transcript = "\n\n".join(paragraph(number) for number in range(12))
+    chunks = chunk_transcript(transcript, 200)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+    assert " ".join(chunks).split() == transcript.split()
+
+
+def test_chunks_end_on_paragraphs_when_they_fit():
+    paragraphs = [paragraph(number) for number in range(6)]
+    chunks = chunk_transcript("\n\n".join(paragraphs), estimate_tokens(paragraphs[0]) * 2 + 5)
+    assert chunks == ["\n\n".join(paragraphs[i:i + 2]) for i in range(0, 6, 2)]
+
+
+def test_long_paragraphs_split_on_sentences_and_long_sentences_on_words():
+    long_paragraph = paragraph(0, sentences=20)
+    chunks = chunk_transcript(long_paragraph, 60)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == long_paragraph
+
+    run_on = " ".join(f"word{number}" for number in range(400))
+    chunks = chunk_transcript(run_on, 50)
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == run_on
+
+
+def test_short_and_empty_transcripts():
+    assert chunk_transcript("One sentence.", 100) == ["One sentence."]
+    assert chunk_transcript("  \n\n ", 100) == []
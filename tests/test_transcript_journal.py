@@ -0,0 +1,164 @@
+import json
+import os
+import numpy as np
+import pytest
+from TranscriptJournal import TranscriptJournal
+from constants import TRANSCRIPT_JOURNAL_FILE
+
+HEADER = {"audio": "abc", "model": "base", "chunking": [60, 120]}
+
+
+def segment(number, start, text):
+    return {"id": number, "start": start, "end": start + 1.0, "text": text}
+
+
+def test_reopening_keeps_checkpointed_chunks_and_drops_a_partial_one(tmp_path):
+    journal = TranscriptJournal(tmp_path).open(HEADER)
+    journal.append_chunk([segment(0, 0.0, " one"), segment(1, 1.0, " two")], 2.0)
+    # A crash in the middle of the next chunk: a segment without its checkpoint
+    journal._file.write(json.dumps({"type": "segment", **segment(2, 2.0, " lost")}) + "\n")
+    journal._file.write('{"type": "segm')
+    journal.close()
+
+    resumed = TranscriptJournal(tmp_path).open(HEADER)
+    assert resumed.text() == " one two"
+    assert resumed.offset == 2.0
+    assert not resumed.complete
+    resumed.append_chunk([segment(2, 2.0, " three")], 3.0)
+    resumed.mark_complete()
+    resumed.close()
+
+    reread = TranscriptJournal(tmp_path)
+    assert [s["text"] for s in reread.load()] == [" one", " two", " three"]
+    assert reread.complete
+
+
+def test_a_different_header_starts_over(tmp_path):
+    journal = TranscriptJournal(tmp_path).open(HEADER)
+    journal.append_chunk([segment(0, 0.0, " one")], 1.0)
+    journal.close()
+
+    restarted = TranscriptJournal(tmp_path).open({**HEADER, "model": "small"})
+    assert restarted.segments == [] and restarted.offset == 0.0
+    restarted.close()
+    with open(os.path.join(tmp_path, TRANSCRIPT_JOURNAL_FILE)) as f:
+        assert [json.loads(line)["type"] for line in f] == ["header"]
+
+
+def test_load_without_a_journal_is_empty(tmp_path):
+    assert TranscriptJournal(tmp_path).load() == []
+
+
+def test_stream_transcript_resumes_after_the_last_checkpoint(tmp_path, monkeypatch):
+    pytest.importorskip("whisper")
+    import VideoTranscriber
+
+    sample_rate = VideoTranscriber.SAMPLE_RATE
+    chunks = [(0, 10 * sample_rate), (10 * sample_rate, 20 * sample_rate), (20 * sample_rate, 30 * sample_rate)]
+    monkeypatch.setattr(VideoTranscriber, "load_audio", lambda video_path, output_folder: np.zeros(30 * sample_rate))
+    monkeypatch.setattr(VideoTranscriber, "video_content_hash", lambda video_path: "hash")
+    monkeypatch.setattr(VideoTranscriber, "split_on_silence", lambda audio: chunks)
+    transcribed = []
+
+    def transcribe_chunks(audio, pending, model_name, workers, crash_after=None):
+        for start, end in pending:
+            if crash_after is not None and len(transcribed) == crash_after:
+                raise KeyboardInterrupt
+            transcribed.append(start)
+            yield {"segments": [{"start": start / sample_rate, "end": end / sample_rate,
+                                 "text": f" part{start // sample_rate}"}]}, end / sample_rate
+
+    monkeypatch.setattr(VideoTranscriber, "_transcribe_chunks",
+                        lambda *args: transcribe_chunks(*args, crash_after=1))
+    with pytest.raises(KeyboardInterrupt):
+        list(VideoTranscriber.stream_transcript("video.mp4", tmp_path))
+    assert transcribed == [0]
+
+    monkeypatch.setattr(VideoTranscriber, "_transcribe_chunks", transcribe_chunks)
+    segments = list(VideoTranscriber.stream_transcript("video.mp4", tmp_path))
+    # The first chunk comes from the journal; only the others are transcribed again
+    assert transcribed == [0, 10 * sample_rate, 20 * sample_rate]
+    assert [s["text"] for s in segments] == [" part0", " part10", " part20"]
+    assert [s["id"] for s in segments] == [0, 1, 2]
+
+
+def test_a_cancelled_transcription_keeps_the_chunk_it_finished(tmp_path, monkeypatch):
+    pytest.importorskip("whisper")
+    import threading
+    import VideoTranscriber
+
+    sample_rate = VideoTranscriber.SAMPLE_RATE
+    chunks = [(0, 10 * sample_rate), (10 * sample_rate, 20 * sample_rate)]
+    monkeypatch.setattr(VideoTranscriber, "load_audio", lambda video_path, output_folder: np.zeros(20 * sample_rate))
+    monkeypatch.setattr(VideoTranscriber, "video_content_hash", lambda video_path: "hash")
+    monkeypatch.setattr(VideoTranscriber, "split_on_silence", lambda audio: chunks)
+    cancel = threading.Event()
+
+    def transcribe_chunks(audio, pending, model_name, workers):
+        for start, end in pending:
+            # Another model is picked while this chunk is being transcribed
+            cancel.set()
+            yield {"segments": [{"start": start / sample_rate, "end": end / sample_rate,
+                                 "text": f" part{start // sample_rate}"}]}, end / sample_rate
+
+    monkeypatch.setattr(VideoTranscriber, "_transcribe_chunks", transcribe_chunks)
+    with pytest.raises(VideoTranscriber.TranscriptionCancelled):
+        list(VideoTranscriber.stream_transcript("video.mp4", tmp_path, cancel=cancel))
+
+    resumed = TranscriptJournal(tmp_path)
+    assert [s["text"] for s in resumed.load()] == [" part0"]
+    assert not resumed.complete
+
+
+def test_starting_another_model_stops_the_running_job_and_failures_are_not_retried(tmp_path, monkeypatch):
+    pytest.importorskip("whisper")
+    import threading
+    import VideoTranscriber
+
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def transcribe_video(video_path, output_folder, model_name, workers, cancel=None):
+        calls.append(model_name)
+        if model_name == "base":
+            started.set()
+            release.wait(5)
+            if cancel.is_set():
+                raise VideoTranscriber.TranscriptionCancelled(model_name)
+        if model_name == "tiny":
+            raise RuntimeError("no audio")
+        return model_name
+
+    monkeypatch.setattr(VideoTranscriber, "transcribe_video", transcribe_video)
+    monkeypatch.setattr(VideoTranscriber, "_background_jobs", {})
+    default = VideoTranscriber.start_transcription("video.mp4", tmp_path, "base")
+    assert started.wait(5)
+    assert VideoTranscriber.start_transcription("video.mp4", tmp_path, "base") is default
+
+    other = VideoTranscriber.start_transcription("video.mp4", tmp_path, "small")
+    release.set()
+    assert other.result(5) == "small"
+    with pytest.raises(VideoTranscriber.TranscriptionCancelled):
+        default.result()
+    assert VideoTranscriber.transcription_error(default) is None
+
+    failed = VideoTranscriber.start_transcription("video.mp4", tmp_path, "tiny")
+    with pytest.raises(RuntimeError):
+        failed.result(5)
+    assert isinstance(VideoTranscriber.transcription_error(failed), RuntimeError)
+    # A failed job is returned as is until a retry is asked for
+    assert VideoTranscriber.start_transcription("video.mp4", tmp_path, "tiny") is failed
+    assert VideoTranscriber.start_transcription("video.mp4", tmp_path, "base", retry=True).result(5) == "base"
+    assert calls == ["base", "small", "tiny", "base"]
+
+
+def test_worker_prompting_and_vad_settings_change_the_transcript_identity(monkeypatch):
+    pytest.importorskip("whisper")
+    import VideoTranscriber
+
+    one_worker = VideoTranscriber._transcription_settings(1)
+    assert VideoTranscriber._transcription_settings(2) != one_worker
+    # Worker processes all transcribe chunks without a prompt, however many there are
+    assert VideoTranscriber._transcription_settings(2) == VideoTranscriber._transcription_settings(4)
+    monkeypatch.setattr(VideoTranscriber, "VAD_ENERGY_RATIO", 0.2)
+    assert VideoTranscriber._transcription_settings(1) != one_worker